@@ -0,0 +1,230 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import term_extractor
+from term_extractor import TermExtractor, STRATEGY_CLASSES
+
+# Замеры производительности стратегий извлечения на синтетических корпусах.
+#
+# Для каждой из семи стратегий и каждого размера корпуса измеряются extract,
+# reconstruct и db_row_to_fact_d: пропускная способность (опр./с), задержка
+# одного вызова (p50/p99, мкс) и пиковый объем выделенной памяти (КБ).
+# Отдельно измеряется холодная загрузка словарей и компиляция грамматик.
+# Результаты сравниваются с сохраненной базовой линией bench_baseline.json.
+#
+#   python bench_extractors.py                       # сравнить с базовой линией
+#   python bench_extractors.py --sizes 10 100 100000 # другие размеры корпусов
+#   python bench_extractors.py --update-baseline     # перезаписать базовую линию
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_baseline.json')
+DEFAULT_SIZES = [10, 100, 1000]
+OPERATIONS = ['extract', 'reconstruct', 'db_row_to_fact_d']
+
+NOUNS = ['скорость', 'масса', 'длина', 'высота', 'радиус', 'цвет', 'форма', 'температура',
+         'площадь', 'материал', 'плотность', 'глубина', 'ширина', 'объем', 'давление']
+OWNERS = ['шара', 'куба', 'ветра', 'тела', 'воды', 'воздуха', 'детали', 'стола',
+          'круга', 'провода', 'корабля', 'моста', 'дома', 'реки', 'горы']
+VALUES = ['дерево', 'металл', 'стекло', 'камень', 'пластик', 'бумага', 'ткань', 'кожа']
+SIGNS = ['положительных', 'неположительных', 'отрицательных', 'неотрицательных']
+
+def make_name(i):
+    return f"{NOUNS[i % len(NOUNS)]} {OWNERS[i // len(NOUNS) % len(OWNERS)]}"
+
+def make_definition(strategy_name, i):
+    """Возвращает i-е синтетическое определение для стратегии (тексты повторяются с периодом 225)."""
+    name = make_name(i)
+    other = make_name(i + 1)
+    if strategy_name == 'DimensionalExtractor':
+        if i % 2:
+            return f"Объем понятия {name} состоит из {SIGNS[i % len(SIGNS)]} размерных значений"
+        return (f"Объем понятия {name} состоит из размерных значений, элементы которого "
+                f"строго больше {i % 10}, но меньше либо равны {i % 10 + 100}")
+    if strategy_name == 'ScalarExtractor':
+        values = ', '.join(VALUES[(i + k) % len(VALUES)] for k in range(1 + i % 4))
+        return f"Объем понятия {name} состоит из множества скалярных значений: {values}"
+    if strategy_name == 'SetExtractor':
+        variants = [
+            "множества названий",
+            f"множества {other} за исключением подмножеств, которым принадлежат элементы множества {name}",
+            f"пересечения множеств {other} и {name}",
+            f"объединения множеств {other} и {name}",
+        ]
+        non_empty = 'непустых ' if i % 2 else ''
+        return f"Объем понятия {name} состоит из конечных {non_empty}подмножеств {variants[i % len(variants)]}"
+    if strategy_name == 'MappingExtractor':
+        return (f"Объем понятия {name} состоит из конечных отображений. Областью определения отображения является "
+                f"{other}. Областью значений отображения является множество вещественных чисел.")
+    if strategy_name == 'UnionExtractor':
+        return (f"Объем понятия {name} состоит из значений, принадлежащих объединению множеств объемов понятий, "
+                f"обозначенных терминами {other}, {make_name(i + 2)}.")
+    if strategy_name == 'StructuralExtractor':
+        return (f"Объем понятия {name} состоит из конечных подмножеств структурных объектов, имеющих одну и ту же "
+                f"структуру. Атрибутами этих структурных объектов являются {other}, {make_name(i + 2)}")
+    if strategy_name == 'SequenceExtractor':
+        return (f"Объем понятия {name} состоит из бесконечного множества конечных последовательностей, "
+                f"элементы каждой последовательности принадлежат конечному множеству {other}")
+    raise ValueError(strategy_name)
+
+def make_rows(strategy_name, facts):
+    """Сохраняет факты во временную базу в памяти и возвращает строки таблицы стратегии."""
+    extractor = TermExtractor(strategy=STRATEGY_CLASSES[strategy_name](), db_path=':memory:',
+                              use_extraction_cache=False)
+    for i, fact_d in enumerate(facts):
+        fact_d = dict(fact_d, термин=f"{fact_d.get('термин', '')} {i}")
+        extractor.save_to_db(fact_d, 'bench', commit=False)
+    extractor.conn.commit()
+    table_name = extractor.table_map[strategy_name][0]
+    extractor.cursor.execute(f'SELECT * FROM {table_name}')
+    rows = extractor.cursor.fetchall()
+    column_names = [desc[0] for desc in extractor.cursor.description]
+    extractor.conn.close()
+    return rows, column_names
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def measure(func, inputs, repeat):
+    """
+    Вызывает func для каждого входа: пропускная способность, p50/p99 (мкс) и пик памяти (КБ).
+    Время берется из самого быстрого из repeat проходов, чтобы снизить влияние шума.
+    """
+    elapsed = None
+    for _ in range(repeat):
+        run_latencies = []
+        gc.collect()
+        started = time.perf_counter()
+        for item in inputs:
+            t0 = time.perf_counter_ns()
+            func(item)
+            run_latencies.append(time.perf_counter_ns() - t0)
+        run_elapsed = time.perf_counter() - started
+        if elapsed is None or run_elapsed < elapsed:
+            elapsed, latencies = run_elapsed, run_latencies
+
+    # Память измеряется отдельным проходом: tracemalloc заметно замедляет выполнение
+    gc.collect()
+    tracemalloc.start()
+    results = [func(item) for item in inputs]
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del results
+
+    latencies.sort()
+    return {
+        'throughput': len(inputs) / elapsed if elapsed else 0.0,
+        'p50_us': percentile(latencies, 0.50) / 1000,
+        'p99_us': percentile(latencies, 0.99) / 1000,
+        'peak_kb': peak / 1024,
+    }
+
+def measure_setup():
+    """Холодная загрузка словарей и компиляция грамматик всех стратегий (выполняется первой)."""
+    started = time.perf_counter()
+    term_extractor.get_morph_analyzer()
+    morph = time.perf_counter() - started
+    started = time.perf_counter()
+    for strategy_class in STRATEGY_CLASSES.values():
+        strategy_class.get_parsers()
+    grammars = time.perf_counter() - started
+    return {'morph_load_s': morph, 'grammar_compile_s': grammars}
+
+def run(sizes, repeat=3, out=sys.stdout):
+    results = {'setup': measure_setup()}
+    for strategy_name, strategy_class in STRATEGY_CLASSES.items():
+        strategy = strategy_class()
+        for size in sizes:
+            definitions = [make_definition(strategy_name, i) for i in range(size)]
+            facts = [strategy.extract(d) for d in definitions]
+            rows, column_names = make_rows(strategy_name, facts)
+            cases = {
+                'extract': (strategy.extract, definitions),
+                'reconstruct': (strategy.reconstruct, facts),
+                'db_row_to_fact_d': (lambda row: strategy.db_row_to_fact_d(row, column_names), rows),
+            }
+            for operation in OPERATIONS:
+                func, inputs = cases[operation]
+                key = f"{strategy_name}/{operation}/{size}"
+                results[key] = measure(func, inputs, repeat)
+                r = results[key]
+                print(f"{key:<48} {r['throughput']:>12.0f} /с  p50 {r['p50_us']:>9.1f} мкс  "
+                      f"p99 {r['p99_us']:>9.1f} мкс  пик {r['peak_kb']:>10.1f} КБ", file=out)
+    return results
+
+def compare(results, baseline, tolerance, memory_tolerance, min_delta_us, out=sys.stdout):
+    """
+    Сравнивает результаты с базовой линией; возвращает список регрессий.
+    p99 на корпусах меньше 1000 определений не сравнивается: это единичные замеры.
+    Рост задержки меньше min_delta_us мкс считается шумом таймера.
+    """
+    def latency_worse(new, old):
+        return new > old * (1 + tolerance) and new - old > min_delta_us
+
+    regressions = []
+    checks = [
+        ('throughput', lambda new, old: new < old * (1 - tolerance)),
+        ('p50_us', latency_worse),
+        ('p99_us', latency_worse),
+        ('peak_kb', lambda new, old: new > old * (1 + memory_tolerance)),
+        ('morph_load_s', lambda new, old: new > old * (1 + tolerance)),
+        ('grammar_compile_s', lambda new, old: new > old * (1 + tolerance)),
+    ]
+    for key, metrics in results.items():
+        old_metrics = baseline.get(key)
+        if not old_metrics:
+            continue
+        size = int(key.rsplit('/', 1)[1]) if key.count('/') == 2 else None
+        for metric, is_worse in checks:
+            if metric == 'p99_us' and size is not None and size < 1000:
+                continue
+            if metric in metrics and metric in old_metrics and is_worse(metrics[metric], old_metrics[metric]):
+                regressions.append((key, metric, old_metrics[metric], metrics[metric]))
+
+    for key, metric, old, new in regressions:
+        print(f"РЕГРЕССИЯ {key} {metric}: {old:.3f} -> {new:.3f}", file=out)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры производительности стратегий извлечения")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="размеры синтетических корпусов (от 10 до 100000)")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="файл базовой линии")
+    parser.add_argument('--repeat', type=int, default=3, help="число проходов для замеров времени")
+    parser.add_argument('--tolerance', type=float, default=1.0,
+                        help="допустимое ухудшение времени относительно базовой линии (доля)")
+    parser.add_argument('--min-delta-us', type=float, default=5.0,
+                        help="минимальный рост задержки (мкс), считающийся регрессией")
+    parser.add_argument('--memory-tolerance', type=float, default=0.1,
+                        help="допустимое увеличение пика памяти относительно базовой линии (доля)")
+    parser.add_argument('--update-baseline', action='store_true', help="сохранить результаты как базовую линию")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.repeat)
+
+    if args.update_baseline:
+        data = {
+            'meta': {'python': platform.python_version(), 'platform': platform.platform()},
+            'results': results,
+        }
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"Базовая линия сохранена в {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"Базовая линия {args.baseline} не найдена; запустите с --update-baseline")
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    regressions = compare(results, baseline, args.tolerance, args.memory_tolerance, args.min_delta_us)
+    if not regressions:
+        print("Регрессий относительно базовой линии нет")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+import atexit
+import sqlite3
+import threading
+
+# Единая точка доступа к базе терминов.
+#
+# Каждый поток получает одно соединение на путь к базе; прагмы журнала,
+# синхронизации, кэша страниц и внешних ключей настраиваются один раз при
+# открытии. Все соединения закрываются при выходе (или явно через close_all).
+# Действия, зарегистрированные через after_transaction, выполняются после
+# фиксации или отката транзакции соединения, а не в момент записи.
+
+DEFAULT_DB_PATH = 'terms.db'
+
+PRAGMAS = [
+    ('journal_mode', 'WAL'),         # читатели не блокируют писателя
+    ('synchronous', 'NORMAL'),       # в режиме WAL безопасно и без fsync на каждую транзакцию
+    ('cache_size', -20000),          # ~20 МБ кэша страниц на соединение
+    ('mmap_size', 256 * 1024 * 1024),
+    ('foreign_keys', 'ON'),
+    ('busy_timeout', 5000),
+]
+
+def casefold_collation(left, right):
+    """Сравнение строк без учета регистра (COLLATE CASEFOLD); встроенная NOCASE знает только ASCII."""
+    left, right = left.casefold(), right.casefold()
+    return (left > right) - (left < right)
+
+_registry_lock = threading.Lock()
+_registry = {}  # (идентификатор потока, путь) -> соединение
+_schema_ready = set()  # ключи _registry, для которых схема уже создана и мигрирована
+
+class Connection(sqlite3.Connection):
+    """Соединение, выполняющее отложенные действия после завершения транзакции."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._after_transaction = {}
+
+    def after_transaction(self, key, callback):
+        """
+        Вызывает callback один раз после ближайшей фиксации или отката (повторная регистрация
+        с тем же key не добавляет вызов). Вне транзакции callback вызывается сразу.
+        """
+        if not self.in_transaction:
+            callback()
+            return
+        self._after_transaction.setdefault(key, callback)
+
+    def _run_after_transaction(self):
+        callbacks, self._after_transaction = self._after_transaction, {}
+        for callback in callbacks.values():
+            callback()
+
+    def commit(self):
+        super().commit()
+        self._run_after_transaction()
+
+    def rollback(self):
+        try:
+            super().rollback()
+        finally:
+            self._run_after_transaction()
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._run_after_transaction()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Встроенный __exit__ не вызывает переопределенные commit/rollback
+        if exc_type is None:
+            try:
+                self.commit()
+            except BaseException:
+                self.rollback()
+                raise
+        else:
+            self.rollback()
+        return False
+
+def open_connection(db_path=DEFAULT_DB_PATH):
+    """Открывает новое соединение с настроенными прагмами (без регистрации)."""
+    # check_same_thread=False нужен только для close_all из другого потока;
+    # сами соединения используются лишь потоком, который их получил
+    conn = sqlite3.connect(db_path, check_same_thread=False, factory=Connection)
+    for name, value in PRAGMAS:
+        conn.execute(f'PRAGMA {name} = {value}')
+    conn.create_collation('CASEFOLD', casefold_collation)
+    return conn
+
+def get_connection(db_path=DEFAULT_DB_PATH):
+    """
+    Возвращает соединение текущего потока с базой db_path.
+    Для ':memory:' каждый вызов создает отдельную базу, поэтому такие соединения не разделяются.
+    """
+    if db_path == ':memory:':
+        return open_connection(db_path)
+
+    key = (threading.get_ident(), db_path)
+    with _registry_lock:
+        conn = _registry.get(key)
+        if conn is None:
+            conn = _registry[key] = open_connection(db_path)
+    return conn
+
+def is_schema_ready(db_path=DEFAULT_DB_PATH):
+    """Проверяет, подготовлена ли схема для соединения текущего потока с db_path."""
+    return (threading.get_ident(), db_path) in _schema_ready
+
+def mark_schema_ready(db_path=DEFAULT_DB_PATH):
+    """Отмечает схему подготовленной до закрытия соединения (для ':memory:' не запоминается)."""
+    if db_path != ':memory:':
+        with _registry_lock:
+            _schema_ready.add((threading.get_ident(), db_path))
+
+def close_connection(db_path=DEFAULT_DB_PATH):
+    """Закрывает соединение текущего потока с базой db_path, если оно открыто."""
+    key = (threading.get_ident(), db_path)
+    with _registry_lock:
+        conn = _registry.pop(key, None)
+        _schema_ready.discard(key)
+    if conn is not None:
+        conn.close()
+
+def close_all():
+    """Закрывает все открытые соединения всех потоков."""
+    with _registry_lock:
+        connections = list(_registry.values())
+        _registry.clear()
+        _schema_ready.clear()
+    for conn in connections:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+atexit.register(close_all)
@@ -0,0 +1,191 @@
+import argparse
+import json
+import os
+import sys
+import zipfile
+import database
+from term_extractor import TermExtractor, bump_domain_revision
+
+# Перенос предметной области между базами одним zip-архивом.
+#
+# Архив содержит:
+#   manifest.json  - формат, имя области, версия схемы и число терминов по таблицам;
+#   terms.jsonl    - по одной строке на термин: таблица, номер в global_order и значения полей;
+#   files/...      - файлы области из рабочего каталога (формулы, состояние интерфейса, модель),
+#                    имя области в именах файлов заменено на {domain}.
+#
+#   python domain_archive.py export "Геометрия" geometry.zip
+#   python domain_archive.py import geometry.zip --domain "Геометрия 2" --replace
+
+ARCHIVE_FORMAT = 1
+
+# Файлы предметной области в рабочем каталоге
+DOMAIN_FILES = [
+    'struct_ontology_{domain}.json',
+    'struct_knowledge_{domain}.json',
+    'ui_state_ontology_{domain}.json',
+    'ui_state_knowledge_{domain}.json',
+    '{domain}_ontology_list_terms.json',
+    '{domain}_knowledge_list_terms.json',
+    '{domain}_ontology_expression_tree.json',
+    '{domain}_knowledge_expression_tree.json',
+    '{domain}_model.json',
+]
+
+def check_domain_name(domain_name):
+    """Имя области входит в имена файлов, поэтому не может быть пустым и содержать разделители пути или '..'."""
+    separators = {'/', '\\', os.sep, os.altsep} - {None}
+    if (not isinstance(domain_name, str) or not domain_name.strip() or '..' in domain_name
+            or '\0' in domain_name or any(sep in domain_name for sep in separators)):
+        raise ValueError(f"Недопустимое имя предметной области: {domain_name!r}")
+    return domain_name
+
+def domain_file_path(files_dir, template, domain_name):
+    """Путь к файлу области; путь за пределами files_dir отвергается."""
+    root = os.path.realpath(files_dir)
+    file_path = os.path.realpath(os.path.join(root, template.format(domain=domain_name)))
+    if os.path.dirname(file_path) != root:
+        raise ValueError(f"Файл области вне каталога {files_dir}: {file_path}")
+    return file_path
+
+def export_domain(domain_name, path, db_path=database.DEFAULT_DB_PATH, files_dir='.'):
+    """Сохраняет термины, порядок и файлы предметной области в zip-архив; возвращает число терминов."""
+    extractor = TermExtractor(strategy=None, db_path=db_path)
+    if extractor._get_domain_id(domain_name) is None:
+        raise ValueError(f"Предметная область «{domain_name}» не найдена")
+
+    fields_by_table = {table_name: fields for table_name, fields in extractor.table_map.values()}
+    counts = {}
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        # Термины записываются по мере чтения курсоров, без загрузки области в память
+        with archive.open('terms.jsonl', 'w') as f:
+            for table_name, row, order_index in extractor.iter_term_rows(domain_name):
+                values = {field: row[field] for field in fields_by_table[table_name]}
+                record = {'table': table_name, 'order': order_index, 'values': values}
+                f.write((json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8'))
+                counts[table_name] = counts.get(table_name, 0) + 1
+
+        files = []
+        for template in DOMAIN_FILES:
+            file_path = os.path.join(files_dir, template.format(domain=domain_name))
+            if os.path.exists(file_path):
+                archive.write(file_path, 'files/' + template)
+                files.append(template)
+
+        manifest = {
+            'format': ARCHIVE_FORMAT,
+            'domain': domain_name,
+            'schema_version': len(TermExtractor.MIGRATIONS),
+            'terms': counts,
+            'files': files,
+        }
+        archive.writestr('manifest.json', json.dumps(manifest, ensure_ascii=False, indent=2))
+    return sum(counts.values())
+
+def import_domain(path, domain_name=None, db_path=database.DEFAULT_DB_PATH, files_dir='.', replace=False):
+    """
+    Загружает предметную область из архива одной транзакцией с новыми id терминов.
+    domain_name переименовывает область; replace=True заменяет существующую область и ее файлы.
+    Возвращает имя загруженной области.
+    """
+    extractor = TermExtractor(strategy=None, db_path=db_path)
+    tables = {table_name: fields for table_name, fields in extractor.table_map.values()}
+
+    with zipfile.ZipFile(path) as archive:
+        manifest = json.loads(archive.read('manifest.json'))
+        if manifest.get('format') != ARCHIVE_FORMAT:
+            raise ValueError(f"Неподдерживаемый формат архива: {manifest.get('format')}")
+        domain_name = domain_name or manifest['domain']
+
+        # Имя из манифеста не доверенное: оно определяет пути записываемых файлов
+        check_domain_name(domain_name)
+        files = {template: domain_file_path(files_dir, template, domain_name)
+                 for template in manifest.get('files', []) if template in DOMAIN_FILES}
+        if not replace:
+            if extractor._get_domain_id(domain_name) is not None:
+                raise ValueError(f"Предметная область «{domain_name}» уже существует")
+            existing = [file_path for file_path in files.values() if os.path.exists(file_path)]
+            if existing:
+                raise ValueError(f"Файлы области уже существуют: {', '.join(existing)}")
+
+        rows_by_table = {}
+        orders = []  # (таблица, термин, номер) в порядке архива
+        with archive.open('terms.jsonl') as f:
+            for line in f:
+                record = json.loads(line)
+                table_name = record['table']
+                if table_name not in tables:
+                    raise ValueError(f"Неизвестная таблица в архиве: {table_name}")
+                values = [record['values'].get(field) for field in tables[table_name]]
+                rows_by_table.setdefault(table_name, []).append(values)
+                if record.get('order') is not None:
+                    orders.append((table_name, values[0], record['order']))
+
+        conn = extractor.conn
+        try:
+            if replace:
+                conn.execute('DELETE FROM domains WHERE name = ?', (domain_name,))
+            domain_id = extractor._get_or_create_domain_id(domain_name, commit=False)
+
+            term_ids = {}
+            for table_name, rows in rows_by_table.items():
+                fields = tables[table_name]
+                conn.executemany(
+                    f"INSERT INTO {table_name} (domain_id, {', '.join(fields)}) "
+                    f"VALUES (?, {', '.join('?' for _ in fields)})",
+                    [[domain_id] + values for values in rows]
+                )
+                # Новые id по уникальному термину внутри области
+                for term_id, term in conn.execute(f'SELECT id, term FROM {table_name} WHERE domain_id = ?', (domain_id,)):
+                    term_ids[(table_name, term)] = term_id
+
+            conn.executemany(
+                'INSERT INTO global_order (domain_id, table_name, term_id, order_index) VALUES (?, ?, ?, ?)',
+                [(domain_id, table_name, term_ids[(table_name, term)], order_index)
+                 for table_name, term, order_index in orders]
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            bump_domain_revision(extractor.db_key, domain_name)
+
+        # Файлы записываются после фиксации транзакции: сначала во временный файл, затем заменой
+        for template, file_path in files.items():
+            tmp_path = file_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(archive.read('files/' + template))
+            os.replace(tmp_path, file_path)
+    return domain_name
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Экспорт и импорт предметной области в zip-архив")
+    parser.add_argument('--db', default=database.DEFAULT_DB_PATH, help="путь к базе данных (по умолчанию terms.db)")
+    parser.add_argument('--files-dir', default='.', help="каталог файлов предметных областей")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = commands.add_parser('export', help="сохранить предметную область в архив")
+    export_parser.add_argument('domain', help="имя предметной области")
+    export_parser.add_argument('path', help="путь к создаваемому архиву")
+
+    import_parser = commands.add_parser('import', help="загрузить предметную область из архива")
+    import_parser.add_argument('path', help="путь к архиву")
+    import_parser.add_argument('--domain', help="новое имя предметной области")
+    import_parser.add_argument('--replace', action='store_true', help="заменить существующую область")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'export':
+            count = export_domain(args.domain, args.path, args.db, args.files_dir)
+            print(f"Экспортировано терминов: {count}")
+        else:
+            domain_name = import_domain(args.path, args.domain, args.db, args.files_dir, args.replace)
+            print(f"Предметная область «{domain_name}» загружена")
+    except (ValueError, KeyError, zipfile.BadZipFile) as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,13 @@
 import tkinter as tk
 from tkinter import messagebox
+from tkinter import filedialog
 from tkinter import ttk, scrolledtext
 from formula_extractor import FormulaExtractor
-from term_extractor import TermExtractor, DimensionalExtractor, ScalarExtractor, SetExtractor, MappingExtractor, UnionExtractor, StructuralExtractor, SequenceExtractor
+from term_extractor import TermExtractor, DimensionalExtractor, ScalarExtractor, SetExtractor, MappingExtractor, UnionExtractor, StructuralExtractor, SequenceExtractor, from_json
 import sqlite3
+import database
+import domain_archive
 from model_generator import ModelGenerator
-import ast
 import json
 import re
 import os
@@ -106,10 +108,9 @@ class ConceptsTab:
         extract_btn = ttk.Button(bottom_frame, text="Извлечь", command=self.extract_action)
         extract_btn.pack(side="right")
 
-        ordered_terms = self.extractor.get_ordered_terms(self.selected_subject)
+        ordered_rows = self.extractor.load_ordered_rows(self.selected_subject)
         
-        for table_name, term_id in ordered_terms:
-            term_data = self.extractor.get_term_data(table_name, term_id)
+        for table_name, term_data in ordered_rows:
             template_type = self.extractor.get_template_type(table_name)
             
             if template_type == 'scalar':
@@ -137,7 +138,7 @@ class ConceptsTab:
         
         # Заполняем поля
         last_template['concept'].insert(0, term_data.get('term', ''))
-        last_template['values'].insert(0, term_data.get('values_list', ''))
+        last_template['values'].insert(0, ', '.join(from_json(term_data.get('values_list'), [])))
         self.make_entry_autoresize(last_template['values'])
         self.make_entry_autoresize(last_template['concept'])
         self.is_save = True
@@ -147,7 +148,7 @@ class ConceptsTab:
         self.insert_dimensional_template()
 
         last_template = self.templates_entries[-1]
-        sign_value = ast.literal_eval(term_data.get('volume'))[0]
+        sign_value = (from_json(term_data.get('volume')) or [None])[0]
 
         last_template['term'].delete(0, tk.END)
         last_template['term'].insert(0, term_data.get('term', ''))
@@ -162,7 +163,7 @@ class ConceptsTab:
             last_template['relations_frame'].pack(side="left")
             last_template['size_label'].configure(text=' размерных значений, ')
 
-            left = ast.literal_eval(term_data.get('left_clar'))
+            left = from_json(term_data.get('left_clar'), ['', '', ''])
             if left[0]:
                 last_template['left_relation'].set(left[0] + ' ' + left[1])
             else:
@@ -172,7 +173,7 @@ class ConceptsTab:
             last_template['left_term'].delete(0, tk.END)
             last_template['left_term'].insert(0, left[2])
 
-            right = ast.literal_eval(term_data.get('right_clar'))
+            right = from_json(term_data.get('right_clar'), ['', '', ''])
             if right[0]:
                 last_template['right_relation'].set(right[0] + ' ' + right[1])
             else:
@@ -263,11 +264,9 @@ class ConceptsTab:
         last_template['main_term'].insert(0, term_data.get('term', ''))
         self.make_entry_autoresize(last_template['main_term'])
         # Обрабатываем список терминов для объединения
-        union_terms = term_data.get('union_terms_list', '')
-        if union_terms:
+        terms_list = from_json(term_data.get('union_terms_list'), [])
+        if terms_list:
             try:
-                # Парсим строку с терминами
-                terms_list = [t.strip() for t in union_terms.split(',')]
                 
                 # Удаляем все существующие комбобоксы (кроме кнопок)
                 for cb in last_template['comboboxes']:
@@ -322,7 +321,7 @@ class ConceptsTab:
         last_template['term'].insert(0, term_data.get('term', ''))
         self.make_entry_autoresize(last_template['term'])
         # Получаем список атрибутов
-        attributes = term_data.get('attrs_list', []).split(', ')
+        attributes = from_json(term_data.get('attrs_list'), [])
 
         # Первый атрибут уже установлен в insert_structural_template, заменим его, если данные есть
         if attributes:
@@ -1500,7 +1499,6 @@ class ConceptsTab:
         resize()
 
     def extract_action(self):
-        current_terms = []
         terms_list = []
 
         mapping_info = {}
@@ -1641,6 +1639,7 @@ class ConceptsTab:
             return False
 
         # 2. Обработка шаблонов
+        pending = []
         for tpl in self.templates_entries:
             if not tpl['container'].winfo_exists():
                 continue
@@ -1726,25 +1725,21 @@ class ConceptsTab:
             if not line or not strategy:
                 continue
 
-            self.extractor.set_strategy(strategy)
-            result = self.extractor.extract_terms(line)
+            pending.append((strategy, line))
+
+        results = self.extractor.extract_many(
+            [(strategy.__class__.__name__, line) for strategy, line in pending]
+        )
+        to_save = []
+        for (strategy, line), result in zip(pending, results):
             term = result.get('термин', '').strip()
             if not term:
                 continue
 
-            strategy_name = strategy.__class__.__name__
-            table = self.extractor.table_map[strategy_name][0]
-            current_terms.append((table, term))
-            self.extractor.save_to_db(result, self.selected_subject)
+            to_save.append((strategy.__class__.__name__, result))
 
-        # 3. Удаление отсутствующих терминов
-        domain_id = self.extractor._get_or_create_domain_id(self.selected_subject)
-        existing = self.extractor.get_all_terms_for_domain(domain_id)
-        to_delete = [ (table, term) for (table, term) in existing if (table, term) not in current_terms ]
-        for table, term in to_delete:
-            self.extractor.delete_term(domain_id, table, term)
-
-        self.extractor.conn.commit()
+        # 3. Сохранение и удаление отсутствующих терминов одной транзакцией
+        self.extractor.sync_domain(to_save, self.selected_subject)
         self.is_save = True
         return True
 
@@ -2895,8 +2890,7 @@ class SubjectSelectorApp:
 
     def load_subject_areas_from_db(self):
         try:
-            conn = sqlite3.connect("terms.db")
-            conn.execute("PRAGMA foreign_keys = ON")
+            conn = database.get_connection()
             cursor = conn.cursor()
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS domains (
@@ -2906,7 +2900,6 @@ class SubjectSelectorApp:
             ''')
             cursor.execute('SELECT name FROM domains ORDER BY name')
             rows = cursor.fetchall()
-            conn.close()
             return [row[0] for row in rows]
         except Exception as e:
             messagebox.showerror("Ошибка", f"Ошибка при загрузке предметных областей: {str(e)}")
@@ -2932,24 +2925,43 @@ class SubjectSelectorApp:
 
     def show_context_menu(self, event, subject_name):
         menu = tk.Menu(self.root, tearoff=0)
+        menu.add_command(label="Экспортировать", command=lambda: self.export_subject_area(subject_name))
         menu.add_command(label="Удалить", command=lambda: self.delete_subject_area(subject_name))
         try:
             menu.tk_popup(event.x_root, event.y_root)
         finally:
             menu.grab_release()
 
+    def export_subject_area(self, subject_name):
+        path = filedialog.asksaveasfilename(title="Экспорт предметной области", defaultextension=".zip",
+                                            initialfile=f"{subject_name}.zip", filetypes=[("Архив", "*.zip")])
+        if not path:
+            return
+        try:
+            count = domain_archive.export_domain(subject_name, path)
+            messagebox.showinfo("Экспорт", f"Экспортировано терминов: {count}")
+        except Exception as e:
+            messagebox.showerror("Ошибка", f"Не удалось экспортировать область: {str(e)}")
+
+    def import_action(self):
+        path = filedialog.askopenfilename(title="Импорт предметной области", filetypes=[("Архив", "*.zip")])
+        if not path:
+            return
+        try:
+            subject_name = domain_archive.import_domain(path)
+        except Exception as e:
+            messagebox.showerror("Ошибка", f"Не удалось импортировать область: {str(e)}")
+            return
+        self.render_subject_buttons()
+        self.select_subject(subject_name)
+
     def delete_subject_area(self, subject_name):
         confirm = messagebox.askyesno("Подтверждение удаления",
                                     f"Вы уверены, что хотите удалить область: «{subject_name}»?")
         if not confirm:
             return
         try:
-            conn = sqlite3.connect("terms.db")
-            conn.execute("PRAGMA foreign_keys = ON")
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM domains WHERE name = ?", (subject_name,))
-            conn.commit()
-            conn.close()
+            TermExtractor(strategy=None).delete_domain(subject_name)
             self.render_subject_buttons()
             if self.selected_subject == subject_name:
                 self.selected_subject = None
@@ -2991,6 +3003,9 @@ class SubjectSelectorApp:
         self.create_button = ttk.Button(btn_frame, text="Создать", command=self.create_action)
         self.create_button.grid(row=0, column=1, padx=5)
 
+        self.import_button = ttk.Button(btn_frame, text="Импорт", command=self.import_action)
+        self.import_button.grid(row=0, column=2, padx=5)
+
     def select_subject(self, subject):
         self.selected_subject = subject
         self.select_button["state"] = tk.NORMAL
@@ -3160,8 +3175,8 @@ class SubjectSelectorApp:
                 return
 
             try:
-                with sqlite3.connect("terms.db") as conn:
-                    conn.execute("PRAGMA foreign_keys = ON")
+                conn = database.get_connection()
+                with conn:
                     cursor = conn.cursor()
                     cursor.execute('''
                         CREATE TABLE IF NOT EXISTS domains (
@@ -3170,7 +3185,6 @@ class SubjectSelectorApp:
                         )
                     ''')
                     cursor.execute('INSERT INTO domains (name) VALUES (?)', (name,))
-                    conn.commit()
             except sqlite3.IntegrityError:
                 messagebox.showerror("Ошибка", "Предметная область с таким названием уже существует.")
                 return
@@ -0,0 +1,133 @@
+import argparse
+import itertools
+import json
+import sys
+import time
+import database
+from term_extractor import TermExtractor
+
+# Потоковая загрузка определений понятий в terms.db без графического интерфейса.
+#
+# Текстовый файл: одно определение на строку, предметная область задается --domain.
+# JSONL: одна запись на строку, например
+#   {"text": "Объем понятия цвет состоит из ...", "domain": "Геометрия", "type": "scalar"}
+# Поля "domain" и "type" необязательны: по умолчанию используются --domain
+# и автоматическое определение стратегии по фразе объема.
+
+def parse_type(extractor: TermExtractor, type_name: str | None) -> str | None:
+    """Приводит тип определения ('scalar' или 'ScalarExtractor') к имени стратегии."""
+    if not type_name:
+        return None
+    if type_name in extractor.strategy_classes:
+        return type_name
+    strategy_name = type_name.capitalize() + 'Extractor'
+    if strategy_name in extractor.strategy_classes:
+        return strategy_name
+    raise ValueError(f"Неизвестный тип определения: {type_name}")
+
+def iter_definitions(path: str, fmt: str, default_domain: str | None):
+    """
+    Лениво читает файл и возвращает кортежи (номер строки, предметная область, тип, текст, ошибка).
+    Для некорректной строки JSONL текст равен None, а ошибка содержит описание; чтение продолжается.
+    """
+    with open(path, encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            if fmt == 'jsonl':
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield line_no, None, None, None, f"некорректный JSON ({e})"
+                    continue
+                if not isinstance(record, dict) or not isinstance(record.get('text'), str):
+                    yield line_no, None, None, None, "нет строкового поля \"text\""
+                    continue
+                yield line_no, record.get('domain', default_domain), record.get('type'), record['text'], None
+            else:
+                yield line_no, default_domain, None, line, None
+
+def ingest(path, fmt, domain, db_path=database.DEFAULT_DB_PATH, batch_size=500, workers=1, out=sys.stderr):
+    extractor = TermExtractor(strategy=None, db_path=db_path)
+    saved = skipped = processed = 0
+    started = time.perf_counter()
+
+    definitions = iter_definitions(path, fmt, domain)
+    try:
+        while True:
+            batch = list(itertools.islice(definitions, batch_size))
+            if not batch:
+                break
+
+            jobs = []
+            for line_no, item_domain, type_name, text, error in batch:
+                if error:
+                    print(f"Строка {line_no}: {error}", file=out)
+                    skipped += 1
+                    continue
+                try:
+                    strategy_name = parse_type(extractor, type_name) or extractor.detect_strategy(text)
+                except ValueError as e:
+                    print(f"Строка {line_no}: {e}", file=out)
+                    skipped += 1
+                    continue
+                jobs.append((line_no, item_domain, strategy_name, text))
+
+            results = extractor.extract_many(
+                [(strategy_name, text) for _, _, strategy_name, text in jobs if strategy_name],
+                workers=workers
+            )
+            results = iter(results)
+
+            # Весь пакет записывается одной транзакцией
+            by_domain = {}
+            for line_no, item_domain, strategy_name, text in jobs:
+                fact_d = next(results) if strategy_name else {}
+                if not item_domain or not fact_d.get('термин', '').strip():
+                    print(f"Строка {line_no}: определение пропущено", file=out)
+                    skipped += 1
+                    continue
+                by_domain.setdefault(item_domain, []).append((strategy_name, fact_d))
+                saved += 1
+            for item_domain, fact_ds in by_domain.items():
+                extractor.save_many(fact_ds, item_domain, commit=False)
+            extractor.conn.commit()
+
+            processed += len(batch)
+            elapsed = time.perf_counter() - started
+            print(f"Обработано {processed} определений ({processed / elapsed:.1f} опр./с)", file=out)
+    finally:
+        extractor.shutdown_workers()
+        database.close_connection(db_path)
+
+    elapsed = time.perf_counter() - started
+    print(f"Готово: сохранено {saved}, пропущено {skipped} за {elapsed:.2f} с", file=out)
+    return saved, skipped
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Загрузка определений понятий из текстового или JSONL-файла в базу терминов")
+    parser.add_argument('path', help="файл с определениями (одно определение на строку)")
+    parser.add_argument('--domain', help="предметная область для строк без поля domain")
+    parser.add_argument('--format', choices=['text', 'jsonl'], help="формат файла; по умолчанию определяется по расширению")
+    parser.add_argument('--db', default=database.DEFAULT_DB_PATH, help="путь к базе данных (по умолчанию terms.db)")
+    parser.add_argument('--batch-size', type=int, default=500, help="число определений в одной транзакции")
+    parser.add_argument('--workers', type=int, default=1, help="число процессов для извлечения")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ('jsonl' if args.path.endswith('.jsonl') else 'text')
+    if fmt == 'text' and not args.domain:
+        parser.error("для текстового файла необходимо указать --domain")
+    if args.batch_size < 1:
+        parser.error("--batch-size должен быть положительным")
+
+    try:
+        saved, skipped = ingest(args.path, fmt, args.domain, args.db, args.batch_size, args.workers)
+    except OSError as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+    # Ненулевой код, если часть строк не загружена
+    return 1 if skipped else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,18 @@
 import tkinter as tk
-import sqlite3
+import database
 from gui import SubjectSelectorApp
 import ttkbootstrap as tb
 from ttkbootstrap.constants import *
 
 if __name__ == "__main__":
 
-    conn = sqlite3.connect('terms.db')
+    conn = database.get_connection()
     cursor = conn.cursor()
 
     cursor.execute("SELECT name, sql FROM sqlite_master WHERE type='table'")
     for name, sql in cursor.fetchall():
         print(f"Table: {name}\nSQL: {sql}\n")
 
-    conn.close()
-
     root = tb.Window(themename="minty")
     root.geometry("450x500")
 
@@ -32,4 +30,5 @@ if __name__ == "__main__":
     root.geometry(f'{window_width}x{window_height}+{center_x}+{center_y}')
 
     app = SubjectSelectorApp(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+    database.close_all()
\ No newline at end of file
@@ -11,8 +11,8 @@ class ModelGenerator:
     def build_concepts_model(self):
         
         line_list = []
-        terms = self.extractor.load_from_db('scalar_terms', self.selected_subject, None, True)
-        for term in terms:
+        # Термины читаются порциями в порядке global_order, не загружая область целиком
+        for term in self.extractor.iter_terms(self.selected_subject):
             if term['Объем'] == 'скалярных':
                 self.extractor.set_strategy(ScalarExtractor())
                 line = self.extractor.reconstruct_terms_str(term)
@@ -1,15 +1,198 @@
-from pymorphy3 import MorphAnalyzer
 from yargy import Parser, rule, or_, and_
+from yargy.morph import MorphAnalyzer
+from yargy.tokenizer import MorphTokenizer
 from yargy.predicates import gram, eq, in_, type, caseless, dictionary
 from yargy.interpretation import fact
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import threading
+import hashlib
+import heapq
+import itertools
+import os
 import sqlite3
+import database
+import time
 import ast
+import json
 import re
 
+# --- Общий морфологический анализатор ---
+# Загрузка словарей занимает заметное время, поэтому анализатор создается
+# один раз на процесс при первом обращении и разделяется всеми стратегиями.
+# Это тот же анализатор (pymorphy2), на котором работает токенизатор yargy,
+# так что словари загружаются в процессе ровно один раз.
+MORPH_CACHE_SIZE = 10000
+
+class LRUMorphAnalyzer(MorphAnalyzer):
+    """Анализатор yargy с ограниченным LRU-кэшем разборов токенов и счетчиками попаданий."""
+    def __init__(self, maxsize=MORPH_CACHE_SIZE):
+        super().__init__()
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __call__(self, word):
+        with self._cache_lock:
+            forms = self._cache.get(word)
+            if forms is not None:
+                self._cache.move_to_end(word)
+                self.hits += 1
+                return forms
+            self.misses += 1
+
+        forms = MorphAnalyzer.__call__(self, word)
+        with self._cache_lock:
+            self._cache[word] = forms
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+                self.evictions += 1
+        return forms
+
+    def cache_info(self) -> dict:
+        with self._cache_lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._cache),
+                'maxsize': self.maxsize,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear_cache(self):
+        with self._cache_lock:
+            self._cache.clear()
+            self.hits = self.misses = self.evictions = 0
+
+_morph_analyzer = None
+_morph_lock = threading.Lock()
+MORPH_STATS = {'constructions': 0, 'load_time': 0.0}
+
+def get_morph_analyzer() -> LRUMorphAnalyzer:
+    global _morph_analyzer
+    if _morph_analyzer is None:
+        with _morph_lock:
+            if _morph_analyzer is None:
+                started = time.perf_counter()
+                _morph_analyzer = LRUMorphAnalyzer()
+                MORPH_STATS['constructions'] += 1
+                MORPH_STATS['load_time'] += time.perf_counter() - started
+    return _morph_analyzer
+
+def get_morph_stats() -> dict:
+    """
+    Возвращает число созданий анализатора, суммарное время загрузки словарей (с)
+    и состояние кэша разборов токенов (если анализатор уже создан).
+    """
+    stats = dict(MORPH_STATS)
+    if _morph_analyzer is not None:
+        stats['cache'] = _morph_analyzer.cache_info()
+    return stats
+
+# --- Общий токенизатор ---
+class TokenStreamTokenizer(MorphTokenizer):
+    """Токенизатор, который пропускает уже размеченный список токенов без повторного анализа."""
+    def __call__(self, text):
+        if isinstance(text, list):
+            return iter(text)
+        return MorphTokenizer.__call__(self, text)
+
+_tokenizer = None
+_tokenizer_lock = threading.Lock()
+
+def get_tokenizer() -> TokenStreamTokenizer:
+    global _tokenizer
+    if _tokenizer is None:
+        with _tokenizer_lock:
+            if _tokenizer is None:
+                _tokenizer = TokenStreamTokenizer(morph=get_morph_analyzer())
+    return _tokenizer
+
+# Название в канонических определениях: русские слова через одиночный пробел
+_NAME = r'[А-Яа-яЁё]+(?: [А-Яа-яЁё]+)*'
+
+# --- Проверка названий для быстрого пути ---
+# Грамматики принимают названия по частям речи: gram('NOUN') и gram('ADJF') верны, если
+# граммема есть хотя бы в одном разборе слова. Каждое слово названия кодируется буквой
+# (N - существительное, A - прилагательное, B - и то и другое, X - ни то ни другое),
+# и правило грамматики проверяется регулярным выражением над строкой кодов. Разборы
+# берутся из общего кэша анализатора, сама грамматика при этом не запускается.
+NOUN_PHRASE = re.compile(r'[AB]*[NB]+')          # ADJF* NOUN+
+SET_PHRASE = re.compile(r'[AB]?[NB]+')           # ADJF? NOUN+
+DOMAIN_PHRASE = re.compile(r'[NB]?[AB]*[NB]+')   # NOUN? ADJF* NOUN+
+
+def _word_code(word: str) -> str:
+    forms = get_morph_analyzer()(word)
+    noun = any('NOUN' in form.grams for form in forms)
+    adjf = any('ADJF' in form.grams for form in forms)
+    return 'B' if noun and adjf else 'N' if noun else 'A' if adjf else 'X'
+
+def name_matches(name: str, phrase: re.Pattern) -> bool:
+    """Проверяет, что грамматика примет название целиком по правилу phrase."""
+    return phrase.fullmatch(''.join(_word_code(word) for word in name.split(' '))) is not None
+
+# --- Хранение составных значений ---
+# Кортежи и списки фактов хранятся в столбцах TEXT как JSON-массивы
+def to_json(value) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+def from_json(text, default=None):
+    """Разбирает JSON-массив из столбца; пустое или поврежденное значение дает default."""
+    if not text:
+        return default
+    try:
+        value = json.loads(text)
+    except ValueError:
+        return default
+    return value if isinstance(value, list) else default
+
 class BaseExtractorStrategy(ABC):
-    def __init__(self):
-        self.morph_analyzer = MorphAnalyzer()
+    # Парсеры грамматики компилируются один раз на класс стратегии
+    # и переиспользуются всеми экземплярами (см. get_parsers).
+    _parsers_lock = threading.Lock()
+
+    # Шаблон канонического определения, которое собирает ConceptsTab (см. extract_template)
+    TEMPLATE = None
+
+    @property
+    def morph_analyzer(self) -> LRUMorphAnalyzer:
+        return get_morph_analyzer()
+
+    @classmethod
+    def build_parsers(cls) -> dict:
+        """Строит парсеры yargy стратегии. Стратегии на регулярных выражениях парсеров не имеют."""
+        return {}
+
+    @classmethod
+    def get_parsers(cls) -> dict:
+        parsers = cls.__dict__.get('_parsers')
+        if parsers is None:
+            with BaseExtractorStrategy._parsers_lock:
+                parsers = cls.__dict__.get('_parsers')
+                if parsers is None:
+                    parsers = cls.build_parsers()
+                    cls._parsers = parsers
+        return parsers
+
+    def extract_template(self, definition: str) -> dict | None:
+        """
+        Быстрый путь без разбора грамматикой для определений, собранных по шаблону.
+        Возвращает None, если определение не совпадает с шаблоном стратегии или грамматика
+        приняла бы названия иначе (см. name_matches), — тогда используется extract().
+        Результат совпадает с extract().
+        """
+        return None
+
+    @staticmethod
+    def tokenize(definition) -> list:
+        """Токенизирует и размечает определение один раз; результат передается всем парсерам стратегии."""
+        return list(get_tokenizer()(definition))
     
     @abstractmethod
     def extract(self, definition):
@@ -21,8 +204,15 @@ class BaseExtractorStrategy(ABC):
 
 # --- Размерные величины ---
 class DimensionalExtractor(BaseExtractorStrategy):
-
-    def create_term_rule(self):
+    TEMPLATE = re.compile(
+        rf'Объем понятия (?P<term>{_NAME}) состоит из (?:'
+        r'(?P<sign>положительных|неположительных|отрицательных|неотрицательных) размерных значений'
+        r'|размерных значений, элементы которого (?P<left_rel>строго больше|больше либо равны|больше) (?P<left_term>\d+|-?∞)'
+        r', но (?P<right_rel>строго меньше|меньше либо равны|меньше) (?P<right_term>\d+|-?∞))$'
+    )
+
+    @staticmethod
+    def create_term_rule():
         Term = fact('Term', ['name'])
         return rule(
             eq('Объем'),
@@ -38,7 +228,8 @@ class DimensionalExtractor(BaseExtractorStrategy):
             ).interpretation(Term.name)
         ).interpretation(Term)
 
-    def create_volume_rule(self):
+    @staticmethod
+    def create_volume_rule():
         ConceptVolume = fact('ConceptVolume', ['sign', 'volume'])
         return rule(
             eq('состоит'),
@@ -48,7 +239,8 @@ class DimensionalExtractor(BaseExtractorStrategy):
             gram('NOUN')
         ).interpretation(ConceptVolume)
 
-    def create_clarification_rule(self, is_left=True):
+    @staticmethod
+    def create_clarification_rule(is_left=True):
         Clarification = fact(
             'Clarification',
             ['pre_first_relation', 'first_relation', 'term_1', 'pre_second_relation', 'second_relation', 'term_2']
@@ -90,15 +282,25 @@ class DimensionalExtractor(BaseExtractorStrategy):
             term_rule
         ).interpretation(Clarification)
 
-    def extract(self, definition):
-        parser_term = Parser(self.create_term_rule())
-        parser_volume = Parser(self.create_volume_rule())
-        parser_clar_left = Parser(self.create_clarification_rule(is_left=True))
-        parser_clar_right = Parser(self.create_clarification_rule(is_left=False))
+    @classmethod
+    def build_parsers(cls):
+        tokenizer = get_tokenizer()
+        return {
+            'term': Parser(cls.create_term_rule(), tokenizer=tokenizer),
+            'volume': Parser(cls.create_volume_rule(), tokenizer=tokenizer),
+            'clar_left': Parser(cls.create_clarification_rule(is_left=True), tokenizer=tokenizer),
+            'clar_right': Parser(cls.create_clarification_rule(is_left=False), tokenizer=tokenizer),
+        }
 
+    def extract(self, definition):
+        parsers = self.get_parsers()
+        parser_term = parsers['term']
+        parser_volume = parsers['volume']
+        parser_clar_left = parsers['clar_left']
+        parser_clar_right = parsers['clar_right']
 
         definition = definition.replace('−', '-')
-        sentence = definition
+        sentence = self.tokenize(definition)
 
         fact_d = {}
 
@@ -129,31 +331,44 @@ class DimensionalExtractor(BaseExtractorStrategy):
             )
 
         return fact_d
+
+    def extract_template(self, definition):
+        match = self.TEMPLATE.match(definition.replace('−', '-'))
+        if not match or not name_matches(match.group('term'), NOUN_PHRASE):
+            return None
+
+        def clarification(relation, term):
+            if relation.startswith('строго'):
+                return ('строго', relation.split()[1], term)
+            return (None, relation.split()[0], term)
+
+        if match.group('sign'):
+            return {
+                'термин': match.group('term'),
+                'Объем': (match.group('sign'), 'размерных'),
+                'Уточнение объема': {}
+            }
+        return {
+            'термин': match.group('term'),
+            'Объем': (None, 'размерных'),
+            'Уточнение объема': {
+                'Левая часть уточнения': clarification(match.group('left_rel'), match.group('left_term')),
+                'Правая часть уточнения': clarification(match.group('right_rel'), match.group('right_term'))
+            }
+        }
     
     def db_row_to_fact_d(self, row: tuple, column_names: list[str]) -> dict:
         d = dict(zip(column_names, row))
         d.pop('id', None)
         d.pop('domain_id', None)
 
-        # Парсим кортеж Объема из строки, если он хранится строкой
-        volume = d.get('volume')
-        if isinstance(volume, str):
-            try:
-                volume = ast.literal_eval(volume)
-            except Exception:
-                volume = None
+        # Объем и уточнения хранятся JSON-массивами
+        volume = from_json(d.get('volume'))
+        if volume is not None:
+            volume = tuple(volume)
 
-        # Аналогично для уточнений, если там строки с кортежами
         def parse_tuple_field(field_name):
-
-            val = d.get(field_name)
-
-            if isinstance(val, str):
-                try:
-                    return ast.literal_eval(val)
-                except Exception:
-                    return (None, None, None)
-            return val or (None, None, None)
+            return tuple(from_json(d.get(field_name), (None, None, None)))
 
         clar_left = parse_tuple_field('left_clar')
         clar_right = parse_tuple_field('right_clar')
@@ -208,8 +423,13 @@ class DimensionalExtractor(BaseExtractorStrategy):
         return parts
 # --- Скалярные величины ---
 class ScalarExtractor(BaseExtractorStrategy):
-    def extract(self, definition):
-        # Пример: "Объем понятия термин состоит из множества скалярных значений: {значение_1, значение_2, ..., значение_n}"
+    TEMPLATE = re.compile(
+        rf'Объем понятия (?P<term>{_NAME}) состоит из множества скалярных значений: (?P<values>{_NAME}(?:, {_NAME})*)$'
+    )
+
+    @classmethod
+    def build_parsers(cls):
+        tokenizer = get_tokenizer()
         Term = fact('Term', ['name'])
         ScalarVolume = fact('ScalarVolume', ['values', 'volume'])
 
@@ -245,10 +465,18 @@ class ScalarExtractor(BaseExtractorStrategy):
             ).interpretation(ScalarVolume.values)
         ).interpretation(ScalarVolume)
 
-        parser_term = Parser(term_rule)
-        parser_scalar = Parser(scalar_volume_rule)
+        return {
+            'term': Parser(term_rule, tokenizer=tokenizer),
+            'scalar': Parser(scalar_volume_rule, tokenizer=tokenizer),
+        }
 
-        sentence = definition
+    def extract(self, definition):
+        # Пример: "Объем понятия термин состоит из множества скалярных значений: {значение_1, значение_2, ..., значение_n}"
+        parsers = self.get_parsers()
+        parser_term = parsers['term']
+        parser_scalar = parsers['scalar']
+
+        sentence = self.tokenize(definition)
 
         fact_d = {}
 
@@ -267,6 +495,20 @@ class ScalarExtractor(BaseExtractorStrategy):
                 fact_d['Уточнение объема'] = m_scalar_list
 
         return fact_d
+
+    def extract_template(self, definition):
+        match = self.TEMPLATE.match(definition)
+        if not match:
+            return None
+        values = match.group('values')
+        names = [match.group('term')] + values.split(', ')
+        if not all(name_matches(name, NOUN_PHRASE) for name in names):
+            return None
+        return {
+            'термин': match.group('term'),
+            'Объем': 'скалярных',
+            'Уточнение объема': values.split(',') if ',' in values else [values]
+        }
     
     def db_row_to_fact_d(self, row: tuple, column_names: list[str]) -> dict:
         d = dict(zip(column_names, row))
@@ -277,7 +519,7 @@ class ScalarExtractor(BaseExtractorStrategy):
         return {
             'термин': d['term'],
             'Объем': d['volume'],
-            'Уточнение объема': [s.strip() for s in d['values_list'].split(',')] if d['values_list'] else []
+            'Уточнение объема': from_json(d['values_list'], [])
         }
 
     def reconstruct(self, fact_d: dict) -> str:
@@ -297,26 +539,29 @@ class ScalarExtractor(BaseExtractorStrategy):
 
 # --- Величины множеств ---
 class SetExtractor(BaseExtractorStrategy):
-    def extract(self, definition):
-        import re
-        from yargy.interpretation import fact
-        from yargy import rule, or_
-        from yargy.predicates import eq, gram
-        from yargy import Parser
-
-        Term = fact('Term', ['name'])
+    # Извлечение термина: "Объем понятия ... состоит из"
+    TERM_PATTERN = re.compile(r'Объем понятия\s+(.*?)\s+состоит из', re.IGNORECASE | re.DOTALL)
+    TEMPLATE = re.compile(
+        r'Объем понятия .+? состоит из конечных (?:(?P<subset_type>непустых) )?подмножеств (?:'
+        rf'множества (?P<set1>{_NAME})(?: за исключением подмножеств, которым принадлежат элементы множества (?P<set2>{_NAME}))?'
+        rf'|(?:пересечения|объединения) множеств (?P<left>{_NAME}) и (?P<right>{_NAME}))$'
+    )
+
+    @staticmethod
+    def detect_operation(sentence):
+        if 'пересечения' in sentence:
+            return 'пересечение'
+        elif 'объединения' in sentence:
+            return 'объединение'
+        elif 'за исключением' in sentence:
+            return 'исключение'
+        return None
+
+    @classmethod
+    def build_parsers(cls):
+        tokenizer = get_tokenizer()
         SetVolume = fact('SetVolume', ['subset_type', 'set1', 'operation', 'set2'])
 
-        # --------------------------
-        # Извлечение термина: "Объем понятия ... состоит из"
-        # --------------------------
-        def extract_term_name(text):
-            pattern = r'Объем понятия\s+(.*?)\s+состоит из'
-            match = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
-            if match:
-                return match.group(1).strip()
-            return None
-
         # множество_1 и множество_2
         noun_phrase = rule(gram('ADJF').optional(), gram('NOUN').repeatable())
 
@@ -378,32 +623,30 @@ class SetExtractor(BaseExtractorStrategy):
             )
         ).interpretation(SetVolume)
 
-        parser_volume = Parser(full_rule)
+        return {'volume': Parser(full_rule, tokenizer=tokenizer)}
+
+    def extract(self, definition):
+        parser_volume = self.get_parsers()['volume']
 
         sentence = definition
         fact_d = {}
 
         # Термин (через шаблон)
-        term_name = extract_term_name(sentence)
-        if term_name:
-            fact_d['термин'] = term_name
+        term_match = self.TERM_PATTERN.search(sentence)
+        if term_match:
+            term_name = term_match.group(1).strip()
+            if term_name:
+                fact_d['термин'] = term_name
 
         # Объем
-        m_vol = parser_volume.find(sentence)
+        m_vol = parser_volume.find(self.tokenize(sentence))
         if m_vol:
             vol = m_vol.fact
 
-            operation = None
             set1 = getattr(vol, 'set1', None)
             set2 = getattr(vol, 'set2', None)
             subset_type = getattr(vol, 'subset_type', None)
-
-            if 'пересечения' in sentence:
-                operation = 'пересечение'
-            elif 'объединения' in sentence:
-                operation = 'объединение'
-            elif 'за исключением' in sentence:
-                operation = 'исключение'
+            operation = self.detect_operation(sentence)
 
             fact_d['Объем'] = (subset_type, 'множеств') 
             fact_d['Уточнение объема'] = {
@@ -413,6 +656,25 @@ class SetExtractor(BaseExtractorStrategy):
             }
 
         return fact_d
+
+    def extract_template(self, definition):
+        match = self.TEMPLATE.match(definition)
+        term_match = self.TERM_PATTERN.search(definition)
+        if not match or not term_match or not term_match.group(1).strip():
+            return None
+        set1 = match.group('set1') or match.group('left')
+        set2 = match.group('set2') or match.group('right')
+        if not all(name_matches(name, SET_PHRASE) for name in (set1, set2) if name):
+            return None
+        return {
+            'термин': term_match.group(1).strip(),
+            'Объем': (match.group('subset_type'), 'множеств'),
+            'Уточнение объема': {
+                'множество_1': set1,
+                'операция': self.detect_operation(definition),
+                'множество_2': set2
+            }
+        }
     
     def db_row_to_fact_d(self, row: tuple, column_names: list[str]) -> dict:
         d = dict(zip(column_names, row))
@@ -462,8 +724,15 @@ class SetExtractor(BaseExtractorStrategy):
 
 # --- Величины отображений ---
 class MappingExtractor(BaseExtractorStrategy):
-    def extract(self, definition):
-
+    TEMPLATE = re.compile(
+        rf'Объем понятия (?P<term>{_NAME}) состоит из конечных отображений\. '
+        rf'Областью определения отображения является (?P<domain>{_NAME})\. '
+        rf'Областью значений отображения является (?P<codomain>{_NAME})\.$'
+    )
+
+    @classmethod
+    def build_parsers(cls):
+        tokenizer = get_tokenizer()
         Term = fact('Term', ['name'])
         MappingVolume = fact('MappingVolume', ['volume'])
         Domain = fact('Domain', ['definition_domain'])
@@ -510,34 +779,58 @@ class MappingExtractor(BaseExtractorStrategy):
             ).interpretation(Codomain.value_domain)
         ).interpretation(Codomain)
 
-        # --- Парсеры ---
-        parser_term = Parser(term_rule)
-        parser_volume = Parser(volume_rule)
-        parser_domain = Parser(domain_rule)
-        parser_codomain = Parser(codomain_rule)
+        return {
+            'term': Parser(term_rule, tokenizer=tokenizer),
+            'volume': Parser(volume_rule, tokenizer=tokenizer),
+            'domain': Parser(domain_rule, tokenizer=tokenizer),
+            'codomain': Parser(codomain_rule, tokenizer=tokenizer),
+        }
+
+    def extract(self, definition):
+        parsers = self.get_parsers()
+        parser_term = parsers['term']
+        parser_volume = parsers['volume']
+        parser_domain = parsers['domain']
+        parser_codomain = parsers['codomain']
 
+        tokens = self.tokenize(definition)
         fact_d = {}
 
-        m_term = parser_term.find(definition)
+        m_term = parser_term.find(tokens)
         if m_term:
             fact_d['термин'] = m_term.fact.name
 
-        m_vol = parser_volume.find(definition)
+        m_vol = parser_volume.find(tokens)
         if m_vol:
             fact_d['Объем'] = m_vol.fact.volume
 
         fact_d['Уточнение объема'] = {}
 
-        m_def = parser_domain.find(definition)
+        m_def = parser_domain.find(tokens)
         if m_def:
             fact_d['Уточнение объема']['Область определения'] = m_def.fact.definition_domain
 
-        m_cod = parser_codomain.find(definition)
+        m_cod = parser_codomain.find(tokens)
         if m_cod:
             fact_d['Уточнение объема']['Область значений'] = m_cod.fact.value_domain
 
         return fact_d
 
+    def extract_template(self, definition):
+        match = self.TEMPLATE.match(definition)
+        if not match or not name_matches(match.group('term'), NOUN_PHRASE):
+            return None
+        if not (name_matches(match.group('domain'), DOMAIN_PHRASE) and name_matches(match.group('codomain'), DOMAIN_PHRASE)):
+            return None
+        return {
+            'термин': match.group('term'),
+            'Объем': 'отображений',
+            'Уточнение объема': {
+                'Область определения': match.group('domain'),
+                'Область значений': match.group('codomain')
+            }
+        }
+
     def reconstruct(self, fact_d: dict) -> str:
         parts = ''
         term_key = next((k for k in fact_d if k.startswith("термин")), None)
@@ -566,18 +859,19 @@ class MappingExtractor(BaseExtractorStrategy):
 
 # --- Объединённые величины ---
 class UnionExtractor(BaseExtractorStrategy):
+    PATTERN = re.compile(
+        r'Объем понятия (?P<term>[\w\s\-]+) состоит из значений, принадлежащих объединению множеств объемов понятий, '
+        r'обозначенных терминами (?P<terms>[\w\d\s,]+)',
+        re.IGNORECASE
+    )
+
     def extract(self, text: str) -> dict:
         """
         Извлекает факт из определения вида:
         Объем понятия Протокол состоит из значений, принадлежащих объединению множеств объемов понятий,
         обозначенных терминами HTTP, FTP, SMTP
         """
-        pattern = re.compile(
-            r'Объем понятия (?P<term>[\w\s\-]+) состоит из значений, принадлежащих объединению множеств объемов понятий, '
-            r'обозначенных терминами (?P<terms>[\w\d\s,]+)',
-            re.IGNORECASE
-        )
-        match = pattern.search(text)
+        match = self.PATTERN.search(text)
         if not match:
             return {}
 
@@ -597,8 +891,7 @@ class UnionExtractor(BaseExtractorStrategy):
 
         term = row_dict.get('term', '')
         volume = row_dict.get('volume', '')
-        union_terms_str = row_dict.get('union_terms_list', '')
-        union_terms = [term.strip() for term in union_terms_str.split(',')] if union_terms_str else []
+        union_terms = from_json(row_dict.get('union_terms_list'), [])
 
         fact_d = {
             'термин': term,
@@ -620,12 +913,13 @@ class UnionExtractor(BaseExtractorStrategy):
 # --- Структурные величины ---
 class StructuralExtractor(BaseExtractorStrategy):
     # Паттерн и логика извлечения
+    PATTERN = re.compile(
+        r"Объем понятия\s+(?P<term>.+?)\s+состоит из конечных подмножеств структурных объектов, "
+        r"имеющих одну и ту же структуру\. Атрибутами этих структурных объектов являются\s+(?P<attrs>.+)$"
+    )
+
     def extract(self, definition: str) -> dict:
-        pattern = (
-            r"Объем понятия\s+(?P<term>.+?)\s+состоит из конечных подмножеств структурных объектов, "
-            r"имеющих одну и ту же структуру\. Атрибутами этих структурных объектов являются\s+(?P<attrs>.+)$"
-        )
-        match = re.match(pattern, definition.strip())
+        match = self.PATTERN.match(definition.strip())
         if not match:
             return {}
 
@@ -645,8 +939,7 @@ class StructuralExtractor(BaseExtractorStrategy):
         row_dict = dict(zip(column_names, row))
         term = row_dict.get('term', '')
         volume = row_dict.get('volume', '')
-        attrs_str = row_dict.get('attrs_list', '')
-        attrs = [a.strip() for a in attrs_str.split(',')] if attrs_str else []
+        attrs = from_json(row_dict.get('attrs_list'), [])
 
         fact_d = {
             'термин': term,
@@ -664,13 +957,13 @@ class StructuralExtractor(BaseExtractorStrategy):
 
 # --- Величины последовательностей ---
 class SequenceExtractor(BaseExtractorStrategy):
+    PATTERN = re.compile(
+        r"Объем понятия\s+(?P<term>.+?)\s+состоит из бесконечного множества конечных последовательностей, "
+        r"элементы каждой последовательности принадлежат конечному множеству\s+(?P<set_name>.+)$"
+    )
+
     def extract(self, definition: str) -> dict:
-        pattern = (
-            r"Объем понятия\s+(?P<term>.+?)\s+состоит из бесконечного множества конечных последовательностей, "
-            r"элементы каждой последовательности принадлежат конечному множеству\s+(?P<set_name>.+)$"
-        )
-        
-        match = re.match(pattern, definition.strip())
+        match = self.PATTERN.match(definition.strip())
         if not match:
             return {}
         
@@ -701,14 +994,144 @@ class SequenceExtractor(BaseExtractorStrategy):
         return (f"Объем понятия {term} состоит из бесконечного множества конечных последовательностей, "
                 f"элементы каждой последовательности принадлежат конечному множеству {clarification}")
 
+STRATEGY_CLASSES = {
+    'DimensionalExtractor': DimensionalExtractor,
+    'ScalarExtractor': ScalarExtractor,
+    'SetExtractor': SetExtractor,
+    'MappingExtractor': MappingExtractor,
+    'UnionExtractor': UnionExtractor,
+    'StructuralExtractor': StructuralExtractor,
+    'SequenceExtractor': SequenceExtractor
+}
+
+# Версия грамматик извлечения. Увеличивается при любом изменении, влияющем
+# на результат extract(), — записи кэша извлечения прежних версий после этого
+# не используются и удаляются при открытии базы.
+GRAMMAR_VERSION = 1
+
+# --- Кэш загруженных терминов ---
+# Факты, загруженные load_from_db, хранятся в процессе вместе с ревизией предметной
+# области. Ревизия увеличивается после фиксации (или отката) транзакции, изменившей
+# область через TermExtractor, и следующее чтение загружает данные заново; пока ревизия
+# не изменилась, чтение не обращается к SQLite. Пока в соединении есть незафиксированные
+# изменения, load_from_db читает базу напрямую и кэш не заполняет.
+# Изменения, внесенные в базу другими процессами, кэш не отслеживает.
+_domain_revisions = {}  # (ключ базы, предметная область или None для всей базы) -> ревизия
+_loaded_terms = {}      # (ключ базы, область, таблица, стратегия, глобальный порядок) -> (ревизия, факты)
+_loaded_terms_lock = threading.Lock()
+_memory_db_ids = itertools.count(1)
+
+def db_cache_key(db_path: str) -> str:
+    """Ключ базы в кэше терминов; каждая база ':memory:' получает собственный ключ."""
+    if db_path == ':memory:':
+        return f':memory:{next(_memory_db_ids)}'
+    return os.path.abspath(db_path)
+
+def bump_domain_revision(db_key: str, domain_name: str | None = None):
+    """Отмечает изменение предметной области (None - всех областей базы)."""
+    with _loaded_terms_lock:
+        _domain_revisions[(db_key, domain_name)] = _domain_revisions.get((db_key, domain_name), 0) + 1
+
+def domain_revision(db_key: str, domain_name: str) -> tuple:
+    return _domain_revisions.get((db_key, None), 0), _domain_revisions.get((db_key, domain_name), 0)
+
+def normalize_definition(definition: str) -> str:
+    return ' '.join(definition.split())
+
+def extract_definition(strategy: BaseExtractorStrategy, definition: str) -> dict:
+    """Извлекает факт: сначала по шаблону без морфологического анализа, иначе грамматикой стратегии."""
+    fact_d = strategy.extract_template(definition)
+    if fact_d is None:
+        fact_d = strategy.extract(definition)
+    return fact_d
+
+# --- Параллельное извлечение ---
+# Экземпляры стратегий рабочего процесса; создаются инициализатором пула.
+_worker_strategies = {}
+
+def _init_extraction_worker():
+    """Загружает словари и компилирует грамматики всех стратегий один раз на рабочий процесс."""
+    get_morph_analyzer()
+    for strategy_name, strategy_class in STRATEGY_CLASSES.items():
+        strategy_class.get_parsers()
+        _worker_strategies[strategy_name] = strategy_class()
+
+def _extract_chunk(chunk: list[tuple]) -> list[dict]:
+    results = []
+    for strategy_name, text in chunk:
+        strategy = _worker_strategies.get(strategy_name)
+        if strategy is None:
+            strategy = _worker_strategies[strategy_name] = STRATEGY_CLASSES[strategy_name]()
+        results.append(extract_definition(strategy, text))
+    return results
+
+# --- Определение стратегии по фразе объема ---
+# Фразы, с которых начинается описание объема после "состоит из".
+# При совпадении нескольких фраз выбирается самая длинная.
+VOLUME_PHRASES = [
+    ('множества скалярных значений', 'ScalarExtractor'),
+    ('размерных значений', 'DimensionalExtractor'),
+    ('положительных размерных значений', 'DimensionalExtractor'),
+    ('неположительных размерных значений', 'DimensionalExtractor'),
+    ('отрицательных размерных значений', 'DimensionalExtractor'),
+    ('неотрицательных размерных значений', 'DimensionalExtractor'),
+    ('конечных подмножеств', 'SetExtractor'),
+    ('конечных непустых подмножеств', 'SetExtractor'),
+    ('конечных отображений', 'MappingExtractor'),
+    ('значений , принадлежащих объединению множеств', 'UnionExtractor'),
+    ('конечных подмножеств структурных объектов', 'StructuralExtractor'),
+    ('бесконечного множества конечных последовательностей', 'SequenceExtractor'),
+]
+
+_VOLUME_WORD = re.compile(r'\w+|[^\w\s]')
+_VOLUME_START = re.compile(r'\bсостоит\s+из\b')
+
+def build_volume_trie(phrases: list[tuple]) -> dict:
+    """Строит префиксное дерево по словам фраз; в узле ключ None хранит имя стратегии."""
+    trie = {}
+    for phrase, strategy_name in phrases:
+        node = trie
+        for word in _VOLUME_WORD.findall(phrase):
+            node = node.setdefault(word, {})
+        node[None] = strategy_name
+    return trie
+
 # Основной класс с паттерном Стратегия
 class TermExtractor:
 
-    def __init__(self, strategy: BaseExtractorStrategy, db_path='terms.db'):
+    # Префиксный словарь фраз объема (после "состоит из") для определения стратегии
+    VOLUME_TRIE = build_volume_trie(VOLUME_PHRASES)
+
+    # Миграции схемы по порядку; версия базы (PRAGMA user_version) равна числу примененных
+    MIGRATIONS = [
+        '_migrate_unique_terms',
+        '_migrate_json_columns',
+        '_migrate_term_search',
+        '_migrate_order_gaps',
+        '_migrate_order_cleanup_triggers',
+    ]
+
+    # Шаг между соседними номерами global_order: перемещение термина занимает номер
+    # между соседями без перенумерации, пока промежуток не исчерпан
+    ORDER_GAP = 1024
+
+    # Наибольшее число записей кэша извлечения и размер порции при поиске в нем
+    EXTRACTION_CACHE_LIMIT = 20000
+    CACHE_LOOKUP_BATCH = 500
+
+    # Таблицы в индексе поиска терминов: rowid записи индекса = id термина * 8 + номер таблицы.
+    # Порядок фиксирован схемой базы и не должен меняться.
+    SEARCH_TABLES = ['dimensional_terms', 'scalar_terms', 'set_terms', 'mapping_terms',
+                     'union_terms', 'structural_terms', 'sequence_terms']
+
+    def __init__(self, strategy: BaseExtractorStrategy, db_path=database.DEFAULT_DB_PATH, use_extraction_cache=True):
         self.strategy = strategy
-        self.conn = sqlite3.connect(db_path)
+        self.use_extraction_cache = use_extraction_cache
+        self.db_path = db_path
+        self.db_key = db_cache_key(db_path)
+        # Соединение общее для всех экземпляров в потоке и закрывается менеджером соединений
+        self.conn = database.get_connection(db_path)
         self.cursor = self.conn.cursor()
-        self._create_domains_table()
         self.table_map = {
             'DimensionalExtractor': ('dimensional_terms', ['term', 'volume', 'left_clar', 'right_clar']),
             'ScalarExtractor': ('scalar_terms', ['term', 'volume', 'values_list']),
@@ -718,27 +1141,226 @@ class TermExtractor:
             'StructuralExtractor': ('structural_terms', ['term', 'volume', 'attrs_list']),
             'SequenceExtractor': ('sequence_terms', ['term', 'volume', 'clarification'])
         }
-        
-        self.strategy_classes = {
-            'DimensionalExtractor': DimensionalExtractor,
-            'ScalarExtractor': ScalarExtractor,
-            'SetExtractor': SetExtractor, 
-            'MappingExtractor': MappingExtractor,
-            'UnionExtractor': UnionExtractor,
-            'StructuralExtractor': StructuralExtractor,
-            'SequenceExtractor': SequenceExtractor
-        }
+        # Обратное соответствие: таблица -> имя стратегии
+        self.table_strategies = {table_name: name for name, (table_name, _) in self.table_map.items()}
+        if not database.is_schema_ready(db_path):
+            self._bootstrap_schema()
+            database.mark_schema_ready(db_path)
+        self.cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'term_search'")
+        self.has_term_search = self.cursor.fetchone() is not None
+
+        self.strategy_classes = STRATEGY_CLASSES
+        self._strategy_instances = {}
+        self._executor = None
+        self._executor_workers = 0
+        self._pending_cache_rows = []
 
     def set_strategy(self, strategy: BaseExtractorStrategy):
         self.strategy = strategy
 
+    def get_strategy(self, strategy_name: str) -> BaseExtractorStrategy:
+        """Возвращает переиспользуемый экземпляр стратегии по имени класса."""
+        strategy = self._strategy_instances.get(strategy_name)
+        if strategy is None:
+            strategy_class = self.strategy_classes.get(strategy_name)
+            if strategy_class is None:
+                raise ValueError(f"Strategy '{strategy_name}' не зарегистрирован в strategy_classes")
+            strategy = self._strategy_instances[strategy_name] = strategy_class()
+        return strategy
+
+    def detect_strategy(self, definition: str) -> str | None:
+        """Определяет имя стратегии за один проход по фразе объема (самое длинное совпадение в VOLUME_TRIE)."""
+        start = _VOLUME_START.search(definition)
+        if not start:
+            return None
+        node = self.VOLUME_TRIE
+        strategy_name = None
+        for word in _VOLUME_WORD.finditer(definition, start.end()):
+            node = node.get(word.group())
+            if node is None:
+                break
+            strategy_name = node.get(None, strategy_name)
+        return strategy_name
+
+    def extract_auto(self, definition: str) -> dict:
+        """Извлекает факт стратегией, определенной по фразе объема; для нераспознанных определений — {}."""
+        strategy_name = self.detect_strategy(definition)
+        if strategy_name is None:
+            return {}
+        return self._extract(self.get_strategy(strategy_name), definition)
+
+    def _extract(self, strategy: BaseExtractorStrategy, definition: str) -> dict:
+        """Шаблон, затем кэш извлечения, затем грамматика; кэшируются только результаты грамматики."""
+        text = normalize_definition(definition)
+        fact_d = strategy.extract_template(text)
+        if fact_d is None:
+            key = (strategy.__class__.__name__, text)
+            fact_d = self._get_cached_facts([key]).get(key)
+            if fact_d is None:
+                fact_d = strategy.extract(text)
+                self._store_cached_facts([(*key, fact_d)])
+        return fact_d
+
     def extract_terms(self, definition):
-        return self.strategy.extract(definition)
+        return self._extract(self.strategy, definition)
+
+    # --- Кэш результатов извлечения ---
+    # (стратегия, хэш нормализованного текста) -> repr(fact_d) для текущей GRAMMAR_VERSION.
+    # Хранит только результаты грамматик: определения, совпавшие с шаблоном, разбираются
+    # быстрее, чем читаются из кэша. Размер ограничен EXTRACTION_CACHE_LIMIT записями.
+    @staticmethod
+    def _definition_hash(text: str) -> str:
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def _get_cached_facts(self, keys: list[tuple]) -> dict:
+        """Возвращает {(стратегия, текст): fact_d} для найденных в кэше пар; запросы выполняются порциями."""
+        if not self.use_extraction_cache or not keys:
+            return {}
+        by_strategy = {}
+        for strategy_name, text in keys:
+            by_strategy.setdefault(strategy_name, {})[self._definition_hash(text)] = text
+
+        found = {}
+        for strategy_name, texts in by_strategy.items():
+            hashes = list(texts)
+            for i in range(0, len(hashes), self.CACHE_LOOKUP_BATCH):
+                chunk = hashes[i:i + self.CACHE_LOOKUP_BATCH]
+                rows = self.conn.execute(f'''
+                    SELECT text_hash, fact FROM extraction_cache
+                    WHERE strategy = ? AND grammar_version = ? AND text_hash IN ({', '.join('?' for _ in chunk)})
+                ''', (strategy_name, GRAMMAR_VERSION, *chunk))
+                for text_hash, fact_repr in rows:
+                    found[(strategy_name, texts[text_hash])] = ast.literal_eval(fact_repr)
+        return found
+
+    def _store_cached_facts(self, entries: list[tuple]):
+        """
+        Сохраняет в кэш записи (стратегия, текст, fact_d) собственной транзакцией. Если в соединении
+        открыта транзакция вызывающего кода, запись откладывается до ее фиксации или отката:
+        извлечение не фиксирует чужие изменения.
+        """
+        if not self.use_extraction_cache or not entries:
+            return
+        self._pending_cache_rows.extend(
+            (strategy_name, self._definition_hash(text), GRAMMAR_VERSION, repr(fact_d))
+            for strategy_name, text, fact_d in entries
+        )
+        self.conn.after_transaction(('extraction_cache', id(self)), self._flush_cached_facts)
+
+    def _flush_cached_facts(self):
+        rows, self._pending_cache_rows = self._pending_cache_rows, []
+        if not rows:
+            return
+        try:
+            self.conn.executemany('''
+                INSERT OR REPLACE INTO extraction_cache (strategy, text_hash, grammar_version, fact)
+                VALUES (?, ?, ?, ?)
+            ''', rows)
+            # Новые и перезаписанные записи получают наибольшие rowid, вытесняются самые старые
+            self.conn.execute(
+                'DELETE FROM extraction_cache WHERE rowid <= (SELECT MAX(rowid) FROM extraction_cache) - ?',
+                (self.EXTRACTION_CACHE_LIMIT,)
+            )
+            self.conn.commit()
+        except sqlite3.Error:
+            # Кэш необязателен: если база занята или соединение закрыто, записи не сохраняются
+            try:
+                self.conn.rollback()
+            except sqlite3.Error:
+                pass
+
+    def clear_extraction_cache(self):
+        self.cursor.execute('DELETE FROM extraction_cache')
+        self.conn.commit()
+
+    def extract_many(self, definitions, workers: int = 1, chunksize: int = 64) -> list[dict]:
+        """
+        Извлекает факты из набора определений.
+        Элемент набора — пара (имя стратегии, текст) или текст, стратегия для которого
+        определяется автоматически. Определения обрабатываются группами по стратегиям,
+        результаты возвращаются в порядке входных данных; для нераспознанных — {}.
+        При workers > 1 определения разбиваются на порции по chunksize и извлекаются
+        в пуле процессов (см. _extract_parallel). Определения, не совпавшие с шаблоном
+        стратегии, сначала ищутся в кэше извлечения.
+        """
+        groups = {}
+        count = 0
+        for index, item in enumerate(definitions):
+            if isinstance(item, str):
+                strategy_name, text = self.detect_strategy(item), item
+            else:
+                strategy_name, text = item
+                if strategy_name not in self.strategy_classes:
+                    raise ValueError(f"Strategy '{strategy_name}' не зарегистрирован в strategy_classes")
+            groups.setdefault(strategy_name, []).append((index, normalize_definition(text)))
+            count += 1
+
+        results = [{} for _ in range(count)]
+        # Определения по шаблону разбираются сразу, остальные ищутся в кэше одним запросом на порцию
+        pending = []
+        for strategy_name, items in groups.items():
+            if strategy_name is None:
+                continue
+            strategy = self.get_strategy(strategy_name)
+            for index, text in items:
+                fact_d = strategy.extract_template(text)
+                if fact_d is None:
+                    pending.append((index, strategy_name, text))
+                else:
+                    results[index] = fact_d
+
+        cached = self._get_cached_facts([(strategy_name, text) for _, strategy_name, text in pending])
+        jobs = []
+        for index, strategy_name, text in pending:
+            fact_d = cached.get((strategy_name, text))
+            if fact_d is None:
+                jobs.append((index, strategy_name, text))
+            else:
+                results[index] = fact_d
+
+        if workers > 1:
+            self._extract_parallel(jobs, results, workers, chunksize)
+        else:
+            for index, strategy_name, text in jobs:
+                results[index] = self.get_strategy(strategy_name).extract(text)
+
+        self._store_cached_facts([(strategy_name, text, results[index]) for index, strategy_name, text in jobs])
+        return results
+
+    def _extract_parallel(self, jobs: list[tuple], results: list, workers: int, chunksize: int):
+        """Раскладывает задания (индекс, стратегия, текст) по рабочим процессам и записывает результаты по индексам."""
+        if chunksize < 1:
+            raise ValueError("chunksize должен быть положительным")
+        chunks = [jobs[i:i + chunksize] for i in range(0, len(jobs), chunksize)]
+        executor = self._get_executor(workers)
+        payloads = ([(strategy_name, text) for _, strategy_name, text in chunk] for chunk in chunks)
+        for chunk, chunk_results in zip(chunks, executor.map(_extract_chunk, payloads)):
+            for (index, _, _), result in zip(chunk, chunk_results):
+                results[index] = result
+
+    def _get_executor(self, workers: int) -> ProcessPoolExecutor:
+        # Пул живет между вызовами, чтобы не загружать словари в рабочих процессах повторно
+        if self._executor is None or self._executor_workers != workers:
+            self.shutdown_workers()
+            self._executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_extraction_worker)
+            self._executor_workers = workers
+        return self._executor
+
+    def shutdown_workers(self):
+        """Останавливает пул процессов параллельного извлечения, если он был запущен."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+            self._executor_workers = 0
     
     def reconstruct_terms_str(self, fact_d):
         return self.strategy.reconstruct(fact_d)
 
-    def _create_domains_table(self):
+    def _bootstrap_schema(self):
+        """
+        Создает все таблицы и индексы и применяет миграции; выполняется один раз на соединение,
+        поэтому пути чтения и записи не выполняют DDL.
+        """
         self.cursor.execute('''
             CREATE TABLE IF NOT EXISTS domains (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -756,30 +1378,204 @@ class TermExtractor:
                 UNIQUE(domain_id, order_index)
             )
         ''')
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS extraction_cache (
+                strategy TEXT,
+                text_hash TEXT,
+                grammar_version INTEGER,
+                fact TEXT,
+                PRIMARY KEY(strategy, text_hash)
+            )
+        ''')
+        # Проверка перед удалением: открытие базы без устаревших записей ничего не пишет
+        self.cursor.execute('SELECT 1 FROM extraction_cache WHERE grammar_version != ? LIMIT 1', (GRAMMAR_VERSION,))
+        if self.cursor.fetchone():
+            self.cursor.execute('DELETE FROM extraction_cache WHERE grammar_version != ?', (GRAMMAR_VERSION,))
+        self.conn.commit()
+
+        # Таблицы терминов создаются до миграций, индексы - после (миграции удаляют дубликаты)
+        for table_name, fields in self.table_map.values():
+            self._create_term_table(table_name, fields)
+        self._migrate_schema()
+        for table_name, _ in self.table_map.values():
+            self._create_term_index(table_name)
         self.conn.commit()
 
-    def _get_or_create_domain_id(self, domain_name):
+    def _migrate_schema(self):
+        """Применяет недостающие миграции из MIGRATIONS; номер версии хранится в PRAGMA user_version."""
+        self.cursor.execute('PRAGMA user_version')
+        if self.cursor.fetchone()[0] >= len(self.MIGRATIONS):
+            return
+
+        # Блокировка на запись до повторной проверки версии: другой процесс мог уже мигрировать базу
+        self.conn.commit()
+        self.cursor.execute('BEGIN IMMEDIATE')
+        try:
+            self.cursor.execute('PRAGMA user_version')
+            version = self.cursor.fetchone()[0]
+            for migration in self.MIGRATIONS[version:]:
+                getattr(self, migration)()
+            self.cursor.execute(f'PRAGMA user_version = {len(self.MIGRATIONS)}')
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+    def _migrate_unique_terms(self):
+        """Миграция 1: уникальные индексы (domain_id, term) и (domain_id, table_name, term_id)."""
+        for table_name, fields in self.table_map.values():
+            self._create_term_table(table_name, fields)
+            # Дубликаты терминов: остается первая запись, как при прежнем поиске в save_to_db
+            self.cursor.execute(f'''
+                DELETE FROM global_order
+                WHERE table_name = ? AND term_id IN (
+                    SELECT id FROM {table_name} AS t
+                    WHERE id > (SELECT MIN(id) FROM {table_name} WHERE domain_id IS t.domain_id AND term IS t.term)
+                )
+            ''', (table_name,))
+            self.cursor.execute(f'''
+                DELETE FROM {table_name}
+                WHERE id > (SELECT MIN(id) FROM {table_name} AS t
+                            WHERE t.domain_id IS {table_name}.domain_id AND t.term IS {table_name}.term)
+            ''')
+            self._create_term_index(table_name)
+
+        self.cursor.execute('''
+            DELETE FROM global_order
+            WHERE order_index > (SELECT MIN(order_index) FROM global_order AS g
+                                 WHERE g.domain_id IS global_order.domain_id
+                                   AND g.table_name IS global_order.table_name
+                                   AND g.term_id IS global_order.term_id)
+        ''')
+        self.cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_global_order_term
+            ON global_order(domain_id, table_name, term_id)
+        ''')
+
+    def _migrate_json_columns(self):
+        """
+        Миграция 2: составные значения переводятся в JSON-массивы
+        (размерные - из repr кортежей, списки - из строк через запятую).
+        """
+        def from_repr(text, default):
+            try:
+                value = ast.literal_eval(text) if text else default
+            except (ValueError, SyntaxError):
+                return default
+            return list(value) if isinstance(value, (tuple, list)) else default
+
+        def from_joined(text):
+            return [part.strip() for part in text.split(',')] if text else []
+
+        self.cursor.execute('SELECT id, volume, left_clar, right_clar FROM dimensional_terms')
+        self.cursor.executemany(
+            'UPDATE dimensional_terms SET volume = ?, left_clar = ?, right_clar = ? WHERE id = ?',
+            [
+                (to_json(from_repr(volume, None)),
+                 to_json(from_repr(left, [None, None, None])),
+                 to_json(from_repr(right, [None, None, None])),
+                 row_id)
+                for row_id, volume, left, right in self.cursor.fetchall()
+            ]
+        )
+        for table_name, column in [('scalar_terms', 'values_list'), ('union_terms', 'union_terms_list'),
+                                   ('structural_terms', 'attrs_list')]:
+            self.cursor.execute(f'SELECT id, {column} FROM {table_name}')
+            self.cursor.executemany(
+                f'UPDATE {table_name} SET {column} = ? WHERE id = ?',
+                [(to_json(from_joined(value)), row_id) for row_id, value in self.cursor.fetchall()]
+            )
+
+    def _migrate_term_search(self):
+        """
+        Миграция 3: полнотекстовый индекс терминов (FTS5, триграммы) по всем таблицам терминов,
+        поддерживаемый триггерами. Без FTS5 в сборке SQLite поиск работает по таблицам терминов.
+        """
+        try:
+            self.cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS term_search
+                USING fts5(term, domain_id UNINDEXED, tokenize = 'trigram')
+            ''')
+        except sqlite3.OperationalError:
+            return
+
+        for k, table_name in enumerate(self.SEARCH_TABLES):
+            self.cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {table_name}_search_insert AFTER INSERT ON {table_name} BEGIN
+                    INSERT INTO term_search (rowid, term, domain_id) VALUES (new.id * 8 + {k}, new.term, new.domain_id);
+                END
+            ''')
+            self.cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {table_name}_search_delete AFTER DELETE ON {table_name} BEGIN
+                    DELETE FROM term_search WHERE rowid = old.id * 8 + {k};
+                END
+            ''')
+            self.cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {table_name}_search_update AFTER UPDATE OF term, domain_id ON {table_name} BEGIN
+                    DELETE FROM term_search WHERE rowid = old.id * 8 + {k};
+                    INSERT INTO term_search (rowid, term, domain_id) VALUES (new.id * 8 + {k}, new.term, new.domain_id);
+                END
+            ''')
+            self.cursor.execute(f'''
+                INSERT INTO term_search (rowid, term, domain_id)
+                SELECT id * 8 + {k}, term, domain_id FROM {table_name} WHERE term IS NOT NULL
+            ''')
+
+    def _migrate_order_gaps(self):
+        """Миграция 4: номера global_order 1, 2, 3... переводятся в ORDER_GAP, 2 * ORDER_GAP..."""
+        # Через отрицательные значения, чтобы не нарушать UNIQUE(domain_id, order_index) по ходу UPDATE
+        self.cursor.execute('UPDATE global_order SET order_index = -order_index * ?', (self.ORDER_GAP,))
+        self.cursor.execute('UPDATE global_order SET order_index = -order_index')
+
+    def _migrate_order_cleanup_triggers(self):
+        """
+        Миграция 5: global_order ссылается на строки разных таблиц и не может иметь внешнего ключа
+        на термин, поэтому удаление термина удаляет его запись global_order триггером.
+        """
+        for table_name in self.SEARCH_TABLES:
+            self.cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {table_name}_order_delete AFTER DELETE ON {table_name} BEGIN
+                    DELETE FROM global_order WHERE table_name = '{table_name}' AND term_id = old.id;
+                END
+            ''')
+
+    def _create_term_index(self, table_name):
+        self.cursor.execute(f'''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_{table_name}_domain_term
+            ON {table_name}(domain_id, term)
+        ''')
+
+    def _get_or_create_domain_id(self, domain_name, commit=True):
         self.cursor.execute('SELECT id FROM domains WHERE name = ?', (domain_name,))
         row = self.cursor.fetchone()
         if row:
             return row[0]
         self.cursor.execute('INSERT INTO domains (name) VALUES (?)', (domain_name,))
-        self.conn.commit()
-        return self.cursor.lastrowid
+        domain_id = self.cursor.lastrowid
+        if commit:
+            self.conn.commit()
+        return domain_id
 
     def get_all_terms_for_domain(self, domain_id):
         """Возвращает список кортежей (table_name, term) для всех терминов в указанной предметной области."""
-        terms = []
-        for strategy_name in self.table_map:
-            table_name, fields = self.table_map[strategy_name]
-            self._create_term_table_if_not_exists(table_name, fields)
-            self.cursor.execute(f'SELECT term FROM {table_name} WHERE domain_id = ?', (domain_id,))
-            rows = self.cursor.fetchall()
-            for row in rows:
-                terms.append((table_name, row[0]))
-        return terms
+        return list(self.iter_all_terms_for_domain(domain_id))
 
-    def delete_term(self, domain_id, table_name, term):
+    def iter_all_terms_for_domain(self, domain_id, batch=500):
+        """Лениво возвращает кортежи (table_name, term) всех терминов предметной области."""
+        for table_name, _ in self.table_map.values():
+            cursor = self.conn.cursor()
+            cursor.execute(f'SELECT term FROM {table_name} WHERE domain_id = ? ORDER BY id', (domain_id,))
+            try:
+                while True:
+                    rows = cursor.fetchmany(batch)
+                    if not rows:
+                        break
+                    for (term,) in rows:
+                        yield table_name, term
+            finally:
+                cursor.close()
+
+    def delete_term(self, domain_id, table_name, term, commit=True):
         """Удаляет термин из указанной таблицы и соответствующую запись в global_order."""
         # Получение term_id
         self.cursor.execute(f'SELECT id FROM {table_name} WHERE domain_id = ? AND term = ?', (domain_id, term))
@@ -796,9 +1592,11 @@ class TermExtractor:
             DELETE FROM global_order 
             WHERE domain_id = ? AND table_name = ? AND term_id = ?
         ''', (domain_id, table_name, term_id))
-        self.conn.commit()
+        self._domain_changed()
+        if commit:
+            self.conn.commit()
 
-    def _create_term_table_if_not_exists(self, table_name, fields):
+    def _create_term_table(self, table_name, fields):
         field_defs = ', '.join([f'{field} TEXT' for field in fields])
         self.cursor.execute(f'''
             CREATE TABLE IF NOT EXISTS {table_name} (
@@ -808,113 +1606,328 @@ class TermExtractor:
                 FOREIGN KEY(domain_id) REFERENCES domains(id) ON DELETE CASCADE
             )
         ''')
-        self.conn.commit()
-
-    def save_to_db(self, fact_d, domain_name):
-        domain_id = self._get_or_create_domain_id(domain_name)
-
-        strategy_class_name = self.strategy.__class__.__name__
-        if strategy_class_name not in self.table_map:
-            raise ValueError(f"Strategy '{strategy_class_name}' не зарегистрирован в table_map")
-
-        table_name, fields = self.table_map[strategy_class_name]
-        self._create_term_table_if_not_exists(table_name, fields)
 
+    def _fact_to_row(self, strategy_class_name, fact_d):
+        """Преобразует факт стратегии в значения полей её таблицы (в порядке table_map)."""
         term = fact_d.get('термин', '').strip()
-        if not term:
-            return  # Пропуск, если термин пустой
-
-        # Проверка существования термина в базе
-        self.cursor.execute(f'''
-            SELECT id, {', '.join(fields)} 
-            FROM {table_name} 
-            WHERE domain_id = ? AND term = ?
-        ''', (domain_id, term))
-        existing_row = self.cursor.fetchone()
-
-        # Формирование значений для вставки/обновления
-        values = []
         if strategy_class_name == 'DimensionalExtractor':
-            term = fact_d.get('термин', '')
             volume = fact_d.get('Объем', (None, None))
             left = fact_d.get('Уточнение объема', {}).get('Левая часть уточнения', ('', '', ''))
             right = fact_d.get('Уточнение объема', {}).get('Правая часть уточнения', ('', '', ''))
-            values = [term, str(volume), str(left), str(right)]
-        elif strategy_class_name == 'ScalarExtractor':
-            term = fact_d.get('термин', '')
+            return [term, to_json(volume), to_json(left), to_json(right)]
+        if strategy_class_name == 'ScalarExtractor':
             volume = fact_d.get('Объем', '')
             values_list = fact_d.get('Уточнение объема', [])
-            values = [term, volume, ', '.join(values_list)]
-        elif strategy_class_name == 'SetExtractor':
-            term = fact_d.get('термин', '')
+            return [term, volume, to_json([value.strip() for value in values_list])]
+        if strategy_class_name == 'SetExtractor':
             subset_type, _ = fact_d.get('Объем', ('', ''))
             clar = fact_d.get('Уточнение объема', {})
-            values = [term, subset_type, clar.get('множество_1', ''), clar.get('операция', ''), clar.get('множество_2', '')]
-        elif strategy_class_name == 'MappingExtractor':
-            term = fact_d.get('термин', '')
+            return [term, subset_type, clar.get('множество_1', ''), clar.get('операция', ''), clar.get('множество_2', '')]
+        if strategy_class_name == 'MappingExtractor':
             volume = fact_d.get('Объем', '')
             clar = fact_d.get('Уточнение объема', {})
-            domain = clar.get('Область определения', '')
-            codomain = clar.get('Область значений', '')
-            values = [term, volume, domain, codomain]
-        elif strategy_class_name == 'UnionExtractor':
-            term = fact_d.get('термин', '')
+            return [term, volume, clar.get('Область определения', ''), clar.get('Область значений', '')]
+        if strategy_class_name == 'UnionExtractor':
             volume = fact_d.get('Объем', '')
             union_terms = fact_d.get('Уточнение объема', [])
-            values = [term, volume, ', '.join(union_terms)]
-        elif strategy_class_name == 'StructuralExtractor':
-            term = fact_d.get('термин', '')
+            return [term, volume, to_json([value.strip() for value in union_terms])]
+        if strategy_class_name == 'StructuralExtractor':
             volume = fact_d.get('Объем', '')
             attrs = fact_d.get('Уточнение объема', [])
-            values = [term, volume, ', '.join(attrs)]
-        elif strategy_class_name == 'SequenceExtractor':
-            term = fact_d.get('термин', '')
+            return [term, volume, to_json([value.strip() for value in attrs])]
+        if strategy_class_name == 'SequenceExtractor':
             volume = fact_d.get('Объем', '')
             clarification = fact_d.get('Уточнение объема', '')
-            values = [term, volume, clarification]
+            return [term, volume, clarification]
+        return []
+
+    def save_to_db(self, fact_d, domain_name, commit=True):
+        """Сохраняет факт текущей стратегии; при commit=False фиксацию транзакции выполняет вызывающий код."""
+        self.save_many([fact_d], domain_name, commit)
 
-        if existing_row:
-            existing_values = list(existing_row[1:])  # Пропуск id
-            if values == existing_values:
-                return  # Нет изменений
+    def save_many(self, fact_ds, domain_name, commit=True):
+        """
+        Сохраняет набор фактов одной транзакцией.
+        Элементы fact_ds - словари фактов текущей стратегии или пары (имя стратегии, факт).
+        Новые термины получают номера global_order подряд в порядке fact_ds.
+        Возвращает пары (таблица, термин) сохраненных терминов.
+        """
+        domain_id = self._get_or_create_domain_id(domain_name, commit=False)
+
+        # Строки по таблицам; повторный термин в наборе заменяет значения предыдущего
+        rows_by_table = {}
+        seen = []  # (стратегия, термин) в порядке первого появления
+        for item in fact_ds:
+            if isinstance(item, tuple):
+                strategy_class_name, fact_d = item
             else:
-                # Обновление записи
-                set_clause = ', '.join([f'{field}=?' for field in fields])
-                self.cursor.execute(f'''
-                    UPDATE {table_name} 
-                    SET {set_clause} 
-                    WHERE id = ?
-                ''', values + [existing_row[0]])
-        else:
-            # Вставка новой записи
+                strategy_class_name, fact_d = self.strategy.__class__.__name__, item
+            if strategy_class_name not in self.table_map:
+                raise ValueError(f"Strategy '{strategy_class_name}' не зарегистрирован в table_map")
+
+            values = self._fact_to_row(strategy_class_name, fact_d)
+            if not values[0]:
+                continue  # Пропуск, если термин пустой
+            table_rows = rows_by_table.setdefault(strategy_class_name, {})
+            if values[0] not in table_rows:
+                seen.append((strategy_class_name, values[0]))
+            table_rows[values[0]] = values
+
+        unordered = {}  # (стратегия, термин) -> id записи без номера в global_order
+        for strategy_class_name, table_rows in rows_by_table.items():
+            table_name, fields = self.table_map[strategy_class_name]
+
+            # Вставка или обновление по уникальному индексу (domain_id, term);
+            # неизмененные записи не перезаписываются
+            value_fields = [field for field in fields if field != 'term']
             placeholders = ', '.join('?' for _ in fields)
-            self.cursor.execute(
-                f'''INSERT INTO {table_name} (domain_id, {', '.join(fields)}) 
-                VALUES (?, {placeholders})''',
-                [domain_id] + values
-            )
-            term_id = self.cursor.lastrowid
-
-            # Обновление global_order
-            self.cursor.execute('''
-                SELECT MAX(order_index) FROM global_order WHERE domain_id = ?
-            ''', (domain_id,))
+            self.cursor.executemany(f'''
+                INSERT INTO {table_name} (domain_id, {', '.join(fields)})
+                VALUES (?, {placeholders})
+                ON CONFLICT(domain_id, term) DO UPDATE SET
+                    {', '.join(f'{field} = excluded.{field}' for field in value_fields)}
+                WHERE {' OR '.join(f'{field} IS NOT excluded.{field}' for field in value_fields)}
+            ''', [[domain_id] + values for values in table_rows.values()])
+
+            # Записи набора, которым еще не назначен номер global_order
+            terms = list(table_rows)
+            for start in range(0, len(terms), 500):
+                chunk = terms[start:start + 500]
+                self.cursor.execute(f'''
+                    SELECT t.id, t.term
+                    FROM {table_name} AS t
+                    LEFT JOIN global_order AS g
+                        ON g.domain_id = t.domain_id AND g.table_name = ? AND g.term_id = t.id
+                    WHERE t.domain_id = ? AND t.term IN ({', '.join('?' for _ in chunk)}) AND g.id IS NULL
+                ''', [table_name, domain_id] + chunk)
+                for term_id, term in self.cursor.fetchall():
+                    unordered[(strategy_class_name, term)] = term_id
+
+        # Номера global_order для всех новых терминов от одного максимума
+        new_terms = [
+            (self.table_map[strategy_class_name][0], unordered[(strategy_class_name, term)])
+            for strategy_class_name, term in seen if (strategy_class_name, term) in unordered
+        ]
+        if new_terms:
+            self.cursor.execute('SELECT MAX(order_index) FROM global_order WHERE domain_id = ?', (domain_id,))
             max_order = self.cursor.fetchone()[0] or 0
-            new_order = max_order + 1
-
-            self.cursor.execute('''
-                INSERT INTO global_order 
+            self.cursor.executemany('''
+                INSERT OR IGNORE INTO global_order
                 (domain_id, table_name, term_id, order_index)
                 VALUES (?, ?, ?, ?)
-            ''', (domain_id, table_name, term_id, new_order))
+            ''', [
+                (domain_id, table_name, term_id, max_order + i * self.ORDER_GAP)
+                for i, (table_name, term_id) in enumerate(new_terms, 1)
+            ])
 
-        self.conn.commit()
+        self._domain_changed(domain_name)
+        if commit:
+            self.conn.commit()
+        return [(self.table_map[strategy_class_name][0], term) for strategy_class_name, term in seen]
+
+    def sync_domain(self, fact_ds, domain_name, commit=True):
+        """
+        Приводит предметную область к набору fact_ds одной транзакцией: новые и измененные
+        термины сохраняются через save_many, отсутствующие в наборе удаляются вместе
+        с записями global_order. Возвращает число удаленных терминов.
+        """
+        saved = self.save_many(fact_ds, domain_name, commit=False)
+        domain_id = self._get_or_create_domain_id(domain_name, commit=False)
+
+        # Текущий набор терминов во временной таблице для разности множеств в SQL
+        self.cursor.execute('''
+            CREATE TEMP TABLE IF NOT EXISTS sync_terms (
+                table_name TEXT,
+                term TEXT,
+                PRIMARY KEY(table_name, term)
+            )
+        ''')
+        self.cursor.execute('DELETE FROM temp.sync_terms')
+        self.cursor.executemany('INSERT OR IGNORE INTO temp.sync_terms (table_name, term) VALUES (?, ?)', saved)
+
+        deleted = 0
+        for table_name, _ in self.table_map.values():
+            stale = f'''
+                SELECT id FROM {table_name}
+                WHERE domain_id = ? AND term NOT IN (SELECT term FROM temp.sync_terms WHERE table_name = ?)
+            '''
+            self.cursor.execute(f'''
+                DELETE FROM global_order
+                WHERE domain_id = ? AND table_name = ? AND term_id IN ({stale})
+            ''', (domain_id, table_name, domain_id, table_name))
+            self.cursor.execute(f'DELETE FROM {table_name} WHERE id IN ({stale})', (domain_id, table_name))
+            deleted += self.cursor.rowcount
+        self.cursor.execute('DELETE FROM temp.sync_terms')
+        self._domain_changed(domain_name)
+
+        if commit:
+            self.conn.commit()
+        return deleted
+
+    def move_term(self, domain_name, table_name, term, after=None, commit=True):
+        """
+        Перемещает термин в global_order сразу после термина after = (таблица, термин)
+        или в начало при after=None. Меняется одна запись: термин получает номер
+        посередине промежутка между соседями; если промежуток исчерпан, номера области
+        перераспределяются (rebalance_order) и перемещение повторяется.
+        """
+        domain_id = self._get_domain_id(domain_name)
+        if domain_id is None:
+            raise ValueError(f"Предметная область «{domain_name}» не найдена")
+        order_id, current = self._get_order_entry(domain_id, table_name, term)
+        if after is not None and tuple(after) == (table_name, term):
+            return
+
+        for attempt in range(2):
+            if after is None:
+                prev_index = None
+                self.cursor.execute('SELECT MIN(order_index) FROM global_order WHERE domain_id = ?', (domain_id,))
+            else:
+                _, prev_index = self._get_order_entry(domain_id, *after)
+                self.cursor.execute(
+                    'SELECT MIN(order_index) FROM global_order WHERE domain_id = ? AND order_index > ?',
+                    (domain_id, prev_index)
+                )
+            next_index = self.cursor.fetchone()[0]
+
+            if next_index == current:
+                return  # Термин уже стоит на этом месте
+            if prev_index is None:
+                new_index = next_index - self.ORDER_GAP
+            elif next_index is None:
+                new_index = prev_index + self.ORDER_GAP
+            elif next_index - prev_index > 1:
+                new_index = (prev_index + next_index) // 2
+            else:
+                self.rebalance_order(domain_name, commit=False)
+                _, current = self._get_order_entry(domain_id, table_name, term)
+                continue
+
+            self.cursor.execute('UPDATE global_order SET order_index = ? WHERE id = ?', (new_index, order_id))
+            break
 
-    def get_term_data(self, table_name: str, term_id: int) -> dict:
-        self.cursor.execute(f'SELECT * FROM {table_name} WHERE id = ?', (term_id,))
+        self._domain_changed(domain_name)
+        if commit:
+            self.conn.commit()
+
+    def _get_order_entry(self, domain_id, table_name, term):
+        """Возвращает (id записи global_order, номер) термина."""
+        if table_name not in self.table_strategies:
+            raise ValueError(f"Неизвестная таблица терминов: {table_name}")
+        self.cursor.execute(f'''
+            SELECT g.id, g.order_index
+            FROM {table_name} AS t
+            JOIN global_order AS g ON g.domain_id = t.domain_id AND g.table_name = ? AND g.term_id = t.id
+            WHERE t.domain_id = ? AND t.term = ?
+        ''', (table_name, domain_id, term))
         row = self.cursor.fetchone()
-        column_names = [desc[0] for desc in self.cursor.description]
-        return dict(zip(column_names, row)) if row else {}
+        if row is None:
+            raise ValueError(f"Термин «{term}» не найден в {table_name}")
+        return row
+
+    def rebalance_order(self, domain_name, commit=True):
+        """Перераспределяет номера global_order области с шагом ORDER_GAP, сохраняя порядок."""
+        domain_id = self._get_domain_id(domain_name)
+        if domain_id is None:
+            return
+        # Сначала выше текущего максимума, затем в отрицательные и обратно:
+        # на каждом шаге новые значения не пересекаются со старыми (UNIQUE проверяется построчно)
+        self.cursor.execute('SELECT MAX(order_index) FROM global_order WHERE domain_id = ?', (domain_id,))
+        base = (self.cursor.fetchone()[0] or 0) + 1
+        self.cursor.execute('''
+            WITH ranked AS (
+                SELECT id, ROW_NUMBER() OVER (ORDER BY order_index) AS position
+                FROM global_order WHERE domain_id = ?
+            )
+            UPDATE global_order SET order_index = ? + ranked.position
+            FROM ranked WHERE global_order.id = ranked.id
+        ''', (domain_id, base))
+        self.cursor.execute(
+            'UPDATE global_order SET order_index = -(order_index - ?) * ? WHERE domain_id = ?',
+            (base, self.ORDER_GAP, domain_id)
+        )
+        self.cursor.execute('UPDATE global_order SET order_index = -order_index WHERE domain_id = ?', (domain_id,))
+        self._domain_changed(domain_name)
+        if commit:
+            self.conn.commit()
+
+    def _domain_changed(self, domain_name=None):
+        """Отмечает изменение области (None - всей базы) после завершения текущей транзакции."""
+        self.conn.after_transaction(
+            ('revision', self.db_key, domain_name),
+            lambda: bump_domain_revision(self.db_key, domain_name)
+        )
+
+    def delete_domain(self, domain_name):
+        """Удаляет предметную область; термины и global_order удаляются каскадно, затем выполняется обслуживание."""
+        self.cursor.execute('DELETE FROM domains WHERE name = ?', (domain_name,))
+        self._domain_changed(domain_name)
+        self.conn.commit()
+        return self.run_maintenance()
+
+    def run_maintenance(self):
+        """
+        Удаляет одной транзакцией строки-сироты (термины без предметной области, записи global_order
+        и индекса поиска без термина) и устаревшие или лишние записи кэша извлечения,
+        затем обновляет статистику планировщика (ANALYZE)
+        и возвращает свободные страницы файлу (incremental vacuum). Возвращает число удаленных строк по таблицам.
+        """
+        purged = {}
+        try:
+            for table_name, _ in self.table_map.values():
+                self.cursor.execute(f'''
+                    DELETE FROM {table_name}
+                    WHERE domain_id IS NULL OR domain_id NOT IN (SELECT id FROM domains)
+                ''')
+                purged[table_name] = self.cursor.rowcount
+
+            self.cursor.execute(f'''
+                DELETE FROM global_order
+                WHERE domain_id IS NULL OR domain_id NOT IN (SELECT id FROM domains)
+                   OR table_name NOT IN ({', '.join('?' for _ in self.table_strategies)})
+            ''', list(self.table_strategies))
+            purged['global_order'] = self.cursor.rowcount
+            for table_name in self.table_strategies:
+                self.cursor.execute(f'''
+                    DELETE FROM global_order
+                    WHERE table_name = ? AND term_id NOT IN (SELECT id FROM {table_name})
+                ''', (table_name,))
+                purged['global_order'] += self.cursor.rowcount
+
+            if self.has_term_search:
+                purged['term_search'] = 0
+                for k, table_name in enumerate(self.SEARCH_TABLES):
+                    self.cursor.execute(f'''
+                        DELETE FROM term_search
+                        WHERE rowid % 8 = {k} AND rowid / 8 NOT IN (SELECT id FROM {table_name})
+                    ''')
+                    purged['term_search'] += self.cursor.rowcount
+            if any(purged.values()):
+                self._domain_changed()
+
+            self.cursor.execute('DELETE FROM extraction_cache WHERE grammar_version != ?', (GRAMMAR_VERSION,))
+            purged['extraction_cache'] = self.cursor.rowcount
+            self.cursor.execute(
+                'DELETE FROM extraction_cache WHERE rowid <= (SELECT MAX(rowid) FROM extraction_cache) - ?',
+                (self.EXTRACTION_CACHE_LIMIT,)
+            )
+            purged['extraction_cache'] += self.cursor.rowcount
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+        self.cursor.execute('ANALYZE')
+
+        # Режим incremental задается один раз и вступает в силу только после полного VACUUM
+        self.cursor.execute('PRAGMA auto_vacuum')
+        if self.cursor.fetchone()[0] != 2:
+            self.cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            self.cursor.execute('VACUUM')
+        else:
+            self.cursor.execute('PRAGMA incremental_vacuum')
+            self.cursor.fetchall()
+        return purged
 
     def load_from_db(
         self, 
@@ -923,66 +1936,197 @@ class TermExtractor:
         strategy: BaseExtractorStrategy, 
         use_global_order: bool = False
     ) -> list[dict]:
+        """
+        Загружает факты предметной области. Результат кэшируется до следующей записи
+        в эту область и разделяется между вызовами, поэтому изменять его нельзя.
+        """
+        if use_global_order:
+            cache_key = (self.db_key, domain_name, None, None, True)
+        else:
+            cache_key = (self.db_key, domain_name, table_name, strategy.__class__.__name__, False)
+        if self.conn.in_transaction:
+            # Незафиксированные данные видны только этому соединению и в кэш не попадают
+            return self._load_from_db(table_name, domain_name, strategy, use_global_order)
+        revision = domain_revision(self.db_key, domain_name)
+        cached = _loaded_terms.get(cache_key)
+        if cached is not None and cached[0] == revision:
+            return cached[1]
+
+        terms = self._load_from_db(table_name, domain_name, strategy, use_global_order)
+        with _loaded_terms_lock:
+            _loaded_terms[cache_key] = (revision, terms)
+        return terms
+
+    def _load_from_db(self, table_name, domain_name, strategy, use_global_order):
         domain_id = self._get_domain_id(domain_name)
         if domain_id is None:
             return []
 
         if use_global_order:
             # Загрузка терминов в порядке из global_order
-            self.cursor.execute('''
-                SELECT table_name, term_id 
-                FROM global_order 
-                WHERE domain_id = ? 
-                ORDER BY order_index
-            ''', (domain_id,))
-            ordered_entries = self.cursor.fetchall()
-            terms = []
-            for tbl_name, term_id in ordered_entries:
-                query = f'SELECT * FROM {tbl_name} WHERE id = ? AND domain_id = ?'
-                self.cursor.execute(query, (term_id, domain_id))
-                row = self.cursor.fetchone()
-                if not row:
-                    continue
-                column_names = [desc[0] for desc in self.cursor.description]
-                # Определение стратегии по имени таблицы
-                strategy_class_name = next(
-                    (k for k, v in self.table_map.items() if v[0] == tbl_name),
-                    None
-                )
-                if not strategy_class_name:
-                    continue
-                strategy_class = self.strategy_classes.get(strategy_class_name)
-                if not strategy_class:
-                    continue
-                strategy_instance = strategy_class()
-                terms.append(strategy_instance.db_row_to_fact_d(row, column_names))
-            return terms
+            return [
+                self.get_strategy(self.table_strategies[tbl_name]).db_row_to_fact_d(row, column_names)
+                for tbl_name, row, column_names in self._iter_ordered_rows(domain_id)
+            ]
         else:
             # Стандартная загрузка из указанной таблицы
-            query = f'SELECT * FROM {table_name} WHERE domain_id = ?'
+            query = f'SELECT * FROM {table_name} WHERE domain_id = ? ORDER BY id'
             self.cursor.execute(query, (domain_id,))
             rows = self.cursor.fetchall()
             column_names = [desc[0] for desc in self.cursor.description]
             return [strategy.db_row_to_fact_d(row, column_names) for row in rows]
         
-    def get_ordered_terms(self, domain_name: str) -> list[tuple]:
+    def search_terms(self, domain_name: str, prefix: str, limit: int = 20, tables=None) -> list[tuple]:
+        """
+        Термины предметной области, начинающиеся с prefix (без учета регистра), в алфавитном порядке.
+        tables ограничивает поиск списком таблиц. Возвращает пары (термин, таблица).
+        """
+        domain_id = self._get_domain_id(domain_name)
+        if domain_id is None:
+            return []
+        search_tables = [t for t in self.SEARCH_TABLES if tables is None or t in tables]
+        if not search_tables:
+            return []
+        prefix = prefix.strip()
+
+        def prefix_end(value):
+            # Наименьшая строка, большая всех строк с началом value
+            return value[:-1] + chr(ord(value[-1]) + 1)
+
+        # Отбор, сортировка и LIMIT выполняются в SQLite; в Python попадает не больше limit строк
+        if len(prefix) >= 3 and self.has_term_search:
+            # Триграммный индекс находит термины, содержащие prefix; начало проверяется диапазоном CASEFOLD
+            folded = prefix.casefold()
+            codes = ', '.join(str(self.SEARCH_TABLES.index(t)) for t in search_tables)
+            self.cursor.execute(f'''
+                SELECT term, rowid % 8 FROM term_search
+                WHERE term_search MATCH ? AND domain_id = ? AND rowid % 8 IN ({codes})
+                  AND term >= ? COLLATE CASEFOLD AND term < ? COLLATE CASEFOLD
+                ORDER BY term COLLATE CASEFOLD, term
+                LIMIT ?
+            ''', ('"' + prefix.replace('"', '""') + '"', domain_id, folded, prefix_end(folded), limit))
+            return [(term, self.SEARCH_TABLES[code]) for term, code in self.cursor.fetchall()]
+
+        if not prefix:
+            clauses = [('1', ())]
+        elif len(prefix) < 3:
+            # Короткий префикс не покрывается триграммами: по диапазону индекса (domain_id, term)
+            # на каждый вариант регистра (не больше четырех для двух букв)
+            variants = {''.join(chars) for chars in itertools.product(*({c.lower(), c.upper()} for c in prefix))}
+            clauses = [('term >= ? AND term < ?', (v, prefix_end(v))) for v in sorted(variants)]
+        else:
+            # База без индекса поиска: диапазон CASEFOLD по терминам области
+            folded = prefix.casefold()
+            clauses = [('term >= ? COLLATE CASEFOLD AND term < ? COLLATE CASEFOLD', (folded, prefix_end(folded)))]
+
+        selects, params = [], []
+        for table_name in search_tables:
+            for condition, bounds in clauses:
+                selects.append(f'SELECT term, ? FROM {table_name} WHERE domain_id = ? AND {condition}')
+                params.extend((table_name, domain_id, *bounds))
+        self.cursor.execute(f"{' UNION ALL '.join(selects)} ORDER BY 1 COLLATE CASEFOLD, 1 LIMIT ?", (*params, limit))
+        return self.cursor.fetchall()
+
+    def _iter_ordered_rows(self, domain_id, batch=500):
+        """
+        Строки всех таблиц терминов предметной области в порядке global_order:
+        по одному запросу с JOIN на таблицу и слияние отсортированных потоков.
+        Строки читаются порциями по batch, поэтому в памяти не больше batch строк на таблицу.
+        Возвращает кортежи (таблица, строка, имена столбцов).
+        """
+        streams = [self._iter_table_rows(table_name, domain_id, batch, 'ordered')
+                   for table_name, _ in self.table_map.values()]
+        for _, table_name, row, column_names in heapq.merge(*streams, key=lambda entry: entry[0]):
+            yield table_name, row, column_names
+
+    def _iter_table_rows(self, table_name, domain_id, batch, mode):
+        """
+        Порционно читает строки таблицы терминов отдельным курсором.
+        mode: 'ordered' - термины с номером global_order по этому номеру,
+        'unordered' - термины без номера, 'all' - все термины; остальные по id.
+        Возвращает кортежи (номер в global_order или None, таблица, строка, имена столбцов).
+        """
+        cursor = self.conn.cursor()
+        if mode == 'ordered':
+            cursor.execute(f'''
+                SELECT g.order_index, t.*
+                FROM global_order AS g
+                JOIN {table_name} AS t ON t.id = g.term_id AND t.domain_id = g.domain_id
+                WHERE g.domain_id = ? AND g.table_name = ?
+                ORDER BY g.order_index
+            ''', (domain_id, table_name))
+        else:
+            cursor.execute(f'''
+                SELECT g.order_index, t.*
+                FROM {table_name} AS t
+                LEFT JOIN global_order AS g
+                    ON g.domain_id = t.domain_id AND g.table_name = ? AND g.term_id = t.id
+                WHERE t.domain_id = ? {'AND g.id IS NULL' if mode == 'unordered' else ''}
+                ORDER BY t.id
+            ''', (table_name, domain_id))
+        column_names = [desc[0] for desc in cursor.description[1:]]
+        try:
+            while True:
+                rows = cursor.fetchmany(batch)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row[0], table_name, row[1:], column_names
+        finally:
+            cursor.close()
+
+    def iter_terms(self, domain_name: str, order: bool = True, batch: int = 500):
+        """
+        Лениво возвращает факты предметной области, читая курсоры порциями по batch строк.
+        order=True - термины в порядке global_order (как load_from_db с use_global_order),
+        order=False - все термины по таблицам в порядке добавления.
+        """
+        domain_id = self._get_domain_id(domain_name)
+        if domain_id is None:
+            return
+        if order:
+            rows = self._iter_ordered_rows(domain_id, batch)
+        else:
+            rows = (
+                (table_name, row, column_names)
+                for table_name, _ in self.table_map.values()
+                for _, table_name, row, column_names in self._iter_table_rows(table_name, domain_id, batch, 'all')
+            )
+        for table_name, row, column_names in rows:
+            yield self.get_strategy(self.table_strategies[table_name]).db_row_to_fact_d(row, column_names)
+
+    def iter_term_rows(self, domain_name: str, batch: int = 500):
+        """
+        Лениво возвращает строки терминов области в виде (таблица, данные, номер global_order):
+        сначала в порядке global_order, затем термины без номера.
+        """
+        domain_id = self._get_domain_id(domain_name)
+        if domain_id is None:
+            return
+        streams = [self._iter_table_rows(table_name, domain_id, batch, 'ordered')
+                   for table_name, _ in self.table_map.values()]
+        unordered = (
+            entry
+            for table_name, _ in self.table_map.values()
+            for entry in self._iter_table_rows(table_name, domain_id, batch, 'unordered')
+        )
+        for order_index, table_name, row, column_names in itertools.chain(
+                heapq.merge(*streams, key=lambda entry: entry[0]), unordered):
+            yield table_name, dict(zip(column_names, row)), order_index
+
+    def load_ordered_rows(self, domain_name: str) -> list[tuple]:
+        """Возвращает пары (таблица, данные термина) предметной области в порядке global_order."""
         domain_id = self._get_domain_id(domain_name)
         if not domain_id:
             return []
+        return [
+            (table_name, dict(zip(column_names, row)))
+            for table_name, row, column_names in self._iter_ordered_rows(domain_id)
+        ]
 
-        self.cursor.execute('''
-            SELECT table_name, term_id 
-            FROM global_order 
-            WHERE domain_id = ? 
-            ORDER BY order_index
-        ''', (domain_id,))
-        return self.cursor.fetchall()
-    
     def get_template_type(self, table_name: str) -> str:
-        for key, value in self.table_map.items():
-            if value[0] == table_name:
-                return key.replace("Extractor", "").lower()
-        return ""
+        strategy_name = self.table_strategies.get(table_name)
+        return strategy_name.replace("Extractor", "").lower() if strategy_name else ""
     
     def _get_domain_id(self, domain_name: str) -> int | None:
         self.cursor.execute('SELECT id FROM domains WHERE name = ?', (domain_name,))
@@ -0,0 +1,77 @@
+import itertools
+import pytest
+from term_extractor import STRATEGY_CLASSES, extract_definition
+
+# Эквивалентность быстрого пути (extract_template) и грамматик (extract).
+# Быстрый путь либо возвращает тот же факт, что и грамматика, либо None.
+#
+#   python -m pytest -q test_extract_template.py
+
+# Названия, которые грамматики принимают целиком
+NAMES = ['цвет', 'скорость ветра', 'радиус шара', 'большой красный шар', 'длина стороны квадрата',
+         'столовая', 'синий цвет', 'точка пересечения']
+# Названия, которые грамматики принимают частично или не принимают вовсе
+ODD_NAMES = ['быстро бегущий человек', 'красивых больших кругов', 'красный', 'зеленый синий',
+             'кот и собака', 'очень большой дом', 'шар красный большой', 'идти домой']
+VALUES = ['дерево', 'дерево, металл, стекло', 'большой дом, маленький дом', 'красный, зеленый, синий',
+          'сталь, бегущий', 'очень большой', 'кот и собака']
+
+def template_definitions(names, values=VALUES):
+    """Определения в том виде, в каком их собирает ConceptsTab."""
+    for term, other in itertools.product(names, repeat=2):
+        yield 'DimensionalExtractor', f'Объем понятия {term} состоит из положительных размерных значений'
+        yield 'DimensionalExtractor', (f'Объем понятия {term} состоит из размерных значений, элементы которого '
+                                       f'строго больше 0, но меньше либо равны ∞')
+        yield 'DimensionalExtractor', (f'Объем понятия {term} состоит из размерных значений, элементы которого '
+                                       f'больше либо равны −∞, но строго меньше 10')
+        yield 'SetExtractor', f'Объем понятия {term} состоит из конечных подмножеств множества {other}'
+        yield 'SetExtractor', (f'Объем понятия {term} состоит из конечных непустых подмножеств множества {other} '
+                               f'за исключением подмножеств, которым принадлежат элементы множества {term}')
+        yield 'SetExtractor', f'Объем понятия {term} состоит из конечных подмножеств пересечения множеств {other} и {term}'
+        yield 'SetExtractor', f'Объем понятия {term} состоит из конечных непустых подмножеств объединения множеств {term} и {other}'
+        yield 'MappingExtractor', (f'Объем понятия {term} состоит из конечных отображений. Областью определения '
+                                   f'отображения является {other}. Областью значений отображения является '
+                                   f'множество вещественных чисел.')
+    for term, value in itertools.product(names, values):
+        yield 'ScalarExtractor', f'Объем понятия {term} состоит из множества скалярных значений: {value}'
+
+FREE_FORM = [
+    ('UnionExtractor', 'Объем понятия фигура состоит из значений, принадлежащих объединению множеств объемов понятий, '
+                       'обозначенных терминами шар, куб, конус.'),
+    ('StructuralExtractor', 'Объем понятия шар состоит из конечных подмножеств структурных объектов, имеющих одну и ту же '
+                            'структуру. Атрибутами этих структурных объектов являются радиус шара, цвет шара'),
+    ('SequenceExtractor', 'Объем понятия маршрут состоит из бесконечного множества конечных последовательностей, '
+                          'элементы которых принадлежат множеству города.'),
+    ('DimensionalExtractor', 'Объем понятия масса  состоит из положительных размерных значений'),
+    ('ScalarExtractor', 'Объем понятия цвет состоит из множества скалярных значений: красный; зеленый'),
+    ('MappingExtractor', 'Объем понятия цвет шара состоит из конечных отображений. Областью определения отображения '
+                         'является шар'),
+]
+
+@pytest.mark.parametrize('strategy_name, definition',
+                         list(template_definitions(NAMES + ODD_NAMES)) + FREE_FORM)
+def test_template_matches_grammar(strategy_name, definition):
+    strategy = STRATEGY_CLASSES[strategy_name]()
+    fact_d = strategy.extract_template(definition)
+    if fact_d is not None:
+        assert fact_d == strategy.extract(definition)
+    assert extract_definition(strategy, definition) == strategy.extract(definition)
+
+@pytest.mark.parametrize('strategy_name, definition',
+                         list(template_definitions(NAMES, ['дерево', 'дерево, металл, стекло', 'большой дом, маленький дом'])))
+def test_canonical_definitions_use_template(strategy_name, definition):
+    assert STRATEGY_CLASSES[strategy_name]().extract_template(definition) is not None
+
+@pytest.mark.parametrize('strategy_name, definition', [
+    # Наречие и причастие в термине: грамматика термин не извлекает
+    ('DimensionalExtractor', 'Объем понятия быстро бегущий человек состоит из положительных размерных значений'),
+    # Два прилагательных в операнде: грамматика объем не извлекает
+    ('SetExtractor', 'Объем понятия фигуры состоит из конечных подмножеств множества красивых больших кругов'),
+    # Прилагательные без существительного: грамматика оставляет только первое значение
+    ('ScalarExtractor', 'Объем понятия цвет состоит из множества скалярных значений: красный, зеленый, синий'),
+    # Наречие в области значений: грамматика область значений не извлекает
+    ('MappingExtractor', 'Объем понятия цена дома состоит из конечных отображений. Областью определения отображения '
+                         'является дом. Областью значений отображения является очень большой дом.'),
+])
+def test_template_falls_back_to_grammar(strategy_name, definition):
+    assert STRATEGY_CLASSES[strategy_name]().extract_template(definition) is None